@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from .db import estimated_count
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор админки для больших таблиц.
+
+    Без фильтров число строк берётся из статистики базы; с фильтрами
+    COUNT ограничен ADMIN_EXACT_COUNT_LIMIT строками подзапроса с LIMIT,
+    дальше лимита страницы не нумеруются.
+    """
+
+    @cached_property
+    def count(self):
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate > limit:
+                return estimate
+        return queryset.order_by()[:limit].count()
+
+
+class PreloadedAutocompleteSelect(AutocompleteSelect):
+    """AutocompleteSelect, который берёт подписи из уже загруженных строк.
+
+    Обычный виджет делает запрос за выбранным значением в каждой строке
+    list_editable. Словарь labels общий для копий виджета в формах
+    одного formset и заполняется из строк changelist.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.labels = {}
+
+    def optgroups(self, name, value, attr=None):
+        selected = [str(item) for item in value
+                    if str(item) not in self.choices.field.empty_values]
+        if any(item not in self.labels for item in selected):
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required and not self.allow_multiple_selected:
+            options.append(self.create_option(name, '', '', False, 0))
+        for item in selected:
+            options.append(self.create_option(
+                name, item, self.labels[item], True, len(options)))
+        return [(None, options, 0)]
+
+
+class LargeTableAdminMixin:
+    """Changelist без точных COUNT(*) по всей таблице и без N+1."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if ('widget' not in kwargs
+                and db_field.name in self.get_autocomplete_fields(request)):
+            kwargs['widget'] = PreloadedAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_formset(self, request, **kwargs):
+        formset = super().get_changelist_formset(request, **kwargs)
+        preloaded = {}
+        for name, field in formset.form.base_fields.items():
+            widget = getattr(field.widget, 'widget', field.widget)
+            if isinstance(widget, PreloadedAutocompleteSelect):
+                preloaded[name] = (field, widget)
+        if not preloaded:
+            return formset
+
+        class PreloadedFormSet(formset):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                # связи уже загружены list_select_related
+                for obj in self.get_queryset():
+                    for name, (field, widget) in preloaded.items():
+                        related = getattr(obj, name)
+                        if related is not None:
+                            widget.labels[str(related.pk)] = (
+                                field.label_from_instance(related))
+
+        return PreloadedFormSet
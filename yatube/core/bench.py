@@ -0,0 +1,126 @@
+import math
+import threading
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.db import connections
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentiles(values, points=PERCENTILES):
+    """Перцентили методом ближайшего ранга, в миллисекундах."""
+    ordered = sorted(values)
+    if not ordered:
+        return {f'p{point}': None for point in points}
+    result = {}
+    for point in points:
+        rank = max(math.ceil(point / 100 * len(ordered)) - 1, 0)
+        result[f'p{point}'] = round(ordered[rank] * 1000, 3)
+    return result
+
+
+class StatementTimer:
+    """execute_wrapper: время каждого запроса, включая ожидание блокировок."""
+
+    def __init__(self):
+        self.durations = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.durations.append(time.perf_counter() - started)
+
+
+def run_threads(workers, duration):
+    """Запускает workers (вызываемые с deadline) в отдельных потоках.
+
+    У каждого потока своё соединение с базой; по завершении
+    оно закрывается, чтобы следующий прогон открыл новое.
+    """
+    deadline = time.monotonic() + duration
+    results = [None] * len(workers)
+
+    def target(number, worker):
+        try:
+            results[number] = worker(deadline)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=target, args=(number, worker))
+               for number, worker in enumerate(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+URL_MODULES = ('posts.urls', 'users.urls', 'about.urls')
+# маршруты, которые имеют смысл только для вошедшего автора
+AUTH_ROUTES = {'posts:post_create', 'posts:post_edit', 'posts:follow_index',
+               'users:logout'}
+# подписка и отписка меняют данные и отвечают редиректом — не меряем
+SKIPPED_ROUTES = {'posts:profile_follow', 'posts:profile_unfollow'}
+# ленты с нумерованными страницами: меряем первую и последнюю
+PAGED_ROUTES = {'posts:index', 'posts:group_list', 'posts:profile'}
+
+
+def iter_routes():
+    """Имена маршрутов и имена их параметров из URL_MODULES."""
+    for module_name in URL_MODULES:
+        module = import_module(module_name)
+        for pattern in module.urlpatterns:
+            name = f'{module.app_name}:{pattern.name}'
+            if name not in SKIPPED_ROUTES:
+                yield name, list(pattern.pattern.converters)
+
+
+def route_sample():
+    """Самые крупные автор и группа: худший случай для их лент."""
+    group = Group.objects.order_by('-post_count').first()
+    author = (User.objects.select_related('profile')
+              .order_by('-profile__post_count').first())
+    post = Post.objects.filter(author=author).order_by('-pub_date').first()
+    if post is None:
+        raise CommandError('Нет постов: сначала запустите seed_bench')
+    return {
+        'posts': Post.objects.count(),
+        'author': author,
+        'post': post,
+        'group': group,
+        'kwargs': {'slug': group and group.slug,
+                   'username': author.username,
+                   'post_id': post.pk},
+        'counts': {'posts:index': None,
+                   'posts:group_list': group and group.post_count,
+                   'posts:profile': author.profile.post_count},
+    }
+
+
+def route_variants(name, params, sample):
+    kwargs = {param: sample['kwargs'][param] for param in params}
+    if None in kwargs.values():
+        return
+    url = reverse(name, kwargs=kwargs)
+    if name == 'posts:search':
+        yield url, {'q': sample['post'].text.split()[0]}
+        return
+    yield url, {}
+    if name in PAGED_ROUTES:
+        count = sample['counts'][name]
+        if count is None:
+            count = sample['posts']
+        last = math.ceil(count / settings.COUNT_IN_PAGES)
+        if last > 1:
+            yield url, {'page': last}
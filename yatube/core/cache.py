@@ -0,0 +1,121 @@
+import math
+import os
+import random
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends import filebased
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+ENTRY_PREFIX = 'swr:'
+LOCK_PREFIX = 'swr-lock:'
+POLL_INTERVAL = 0.05
+
+
+def refresh_early(entry, now, beta):
+    """Вероятностное раннее истечение (XFetch).
+
+    Чем ближе мягкий срок и чем дольше шла сборка, тем вероятнее, что
+    запрос пересоберёт запись заранее; после мягкого срока — всегда.
+    Так записи, созданные одновременно, не истекают одновременно.
+    """
+    gap = -entry['delta'] * beta * math.log(1 - random.random())
+    return now + gap >= entry['soft_expires']
+
+
+def wait_for_builder(key):
+    """Запись, которую соберёт держатель блокировки, или None."""
+    deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(ENTRY_PREFIX + key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def fetch(key, build, timeout, stale_timeout=None, is_fresh=None):
+    """Значение из кеша или build() — не больше одной сборки на ключ.
+
+    Запись свежая timeout секунд (мягкий срок) и ещё stale_timeout
+    секунд (до жёсткого срока) может отдаваться устаревшей. is_fresh
+    проверяет значение, например по версиям зависимостей. Просроченную
+    или устаревшую запись пересобирает запрос, взявший блокировку
+    cache.add; остальные отдают старое значение. Если записи нет
+    совсем, они ждут сборщика до CACHE_LOCK_WAIT секунд, затем
+    собирают сами, не записывая результат.
+
+    build() возвращает значение или None — тогда в кеш ничего не
+    пишется. Возвращает пару (значение, взято ли оно из кеша).
+    Нужен бэкенд с атомарным cache.add: locmem, memcached или
+    FileBasedCache из этого модуля.
+    """
+    if stale_timeout is None:
+        stale_timeout = settings.CACHE_STALE_TIMEOUT
+    entry = cache.get(ENTRY_PREFIX + key)
+    if entry is not None and (is_fresh is None or is_fresh(entry['value'])):
+        if not refresh_early(entry, time.time(),
+                             settings.CACHE_EARLY_EXPIRY_BETA):
+            return entry['value'], True
+    lock = LOCK_PREFIX + key
+    if not cache.add(lock, True, settings.CACHE_LOCK_TIMEOUT):
+        if entry is not None:
+            return entry['value'], True
+        entry = wait_for_builder(key)
+        if entry is not None:
+            return entry['value'], True
+        # сборщик не успел или упал
+        return build(), False
+    # блокировку могли отпустить, пока мы читали старую запись
+    rebuilt = cache.get(ENTRY_PREFIX + key)
+    if rebuilt is not None and (
+            entry is None
+            or rebuilt['soft_expires'] != entry['soft_expires']) and (
+            is_fresh is None or is_fresh(rebuilt['value'])):
+        cache.delete(lock)
+        return rebuilt['value'], True
+    try:
+        started = time.monotonic()
+        value = build()
+        if value is not None:
+            cache.set(ENTRY_PREFIX + key, {
+                'value': value,
+                'soft_expires': time.time() + timeout,
+                'delta': time.monotonic() - started,
+            }, timeout + stale_timeout)
+    finally:
+        cache.delete(lock)
+    return value, False
+
+
+class FileBasedCache(filebased.FileBasedCache):
+    """Файловый кеш, общий для процессов, с атомарным add.
+
+    В Django add — это has_key и set: два процесса могут оба решить,
+    что ключа нет, и оба взять блокировку fetch. Здесь запись
+    создаётся через os.link, который не перезаписывает файл.
+    """
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._createdir()
+        fname = self._key_to_file(key, version)
+        # без _cull: он просматривает весь каталог, а add — это блокировки
+        # на горячем пути; место освобождает set
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        try:
+            with open(fd, 'wb') as f:
+                self._write_content(f, timeout, value)
+            for _ in range(2):
+                try:
+                    os.link(tmp_path, fname)
+                    return True
+                except FileExistsError:
+                    if self.has_key(key, version):
+                        return False
+                    # просроченная запись не мешает add
+                    self._delete(fname)
+            return False
+        finally:
+            os.remove(tmp_path)
@@ -0,0 +1,77 @@
+import re
+
+from django.conf import settings
+from django.db import connections
+
+PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+PRAGMA_VALUE = re.compile(r'^-?\w+$')
+
+
+def sqlite_pragmas():
+    """PRAGMA из settings.SQLITE_PRAGMAS в порядке объявления."""
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None) or {}
+    for name, value in pragmas.items():
+        if not PRAGMA_NAME.match(name):
+            raise ValueError(f'Недопустимое имя PRAGMA: {name!r}')
+        if not PRAGMA_VALUE.match(str(value)):
+            raise ValueError(f'Недопустимое значение PRAGMA {name}: {value!r}')
+    return pragmas
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Настраивает каждое новое соединение SQLite (сигнал connection_created).
+
+    journal_mode=WAL хранится в самом файле базы, остальные PRAGMA
+    действуют только на текущее соединение, поэтому ставятся каждый раз.
+    Для базы в памяти WAL недоступен, SQLite молча оставляет memory.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    # курсор драйвера в обход execute_wrapper: PRAGMA не должны попадать
+    # в бюджеты запросов и метрики view, внутри которого открылось соединение
+    cursor = connection.connection.cursor()
+    try:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+def current_pragmas(connection, names):
+    with connection.cursor() as cursor:
+        values = {}
+        for name in names:
+            cursor.execute(f'PRAGMA {name}')
+            values[name] = cursor.fetchone()[0]
+        return values
+
+
+def estimated_count(model, using='default'):
+    """Приблизительное число строк таблицы без COUNT(*).
+
+    PostgreSQL: reltuples из pg_class. SQLite: число строк из sqlite_stat1
+    (после ANALYZE), иначе максимальный первичный ключ.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [table])
+            row = cursor.fetchone()
+            if row and row[0] > 0:
+                return row[0]
+        elif connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master "
+                           "WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone():
+                cursor.execute('SELECT stat FROM sqlite_stat1 '
+                               'WHERE tbl = %s AND idx IS NOT NULL LIMIT 1',
+                               [table])
+                row = cursor.fetchone()
+                if row:
+                    return int(row[0].split()[0])
+    latest = (model._default_manager.using(using).order_by('-pk')
+              .values_list('pk', flat=True).first())
+    return latest or 0
@@ -0,0 +1,104 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.bench import (AUTH_ROUTES, iter_routes, percentiles, route_sample,
+                        route_variants)
+
+
+def response_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+class Command(BaseCommand):
+    help = ('Замеряет все маршруты posts, users и about тестовым клиентом: '
+            'p50/p95/p99, запросы к базе и размер ответа, результат в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--cold', action='store_true',
+                            help='Очищать кеш перед каждым запросом')
+        parser.add_argument('--output', help='Куда сохранить JSON')
+        parser.add_argument('--compare', help='JSON прошлого прогона')
+
+    def handle(self, *args, **options):
+        sample = route_sample()
+        results = []
+        for name, params in iter_routes():
+            for url, data in route_variants(name, params, sample):
+                results.append(self.measure(
+                    name, url, data, sample['author'], options))
+        report = {
+            'created': timezone.now().isoformat(),
+            'posts': sample['posts'],
+            'pagination_mode': settings.PAGINATION_MODE,
+            'repeat': options['repeat'],
+            'cold': options['cold'],
+            'results': results,
+        }
+        self.print_report(results, options['compare'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                json.dump(report, stream, ensure_ascii=False, indent=2)
+
+    def measure(self, name, url, data, author, options):
+        client = Client()
+        if name in AUTH_ROUTES:
+            client.force_login(author)
+        client.get(url, data)
+        latencies, queries, sizes = [], [], []
+        status = None
+        for _ in range(options['repeat']):
+            if options['cold']:
+                cache.clear()
+            if name == 'users:logout':
+                client.force_login(author)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url, data)
+                sizes.append(response_size(response))
+                latencies.append(time.perf_counter() - started)
+            queries.append(len(captured))
+            status = response.status_code
+        if data:
+            url = f'{url}?' + '&'.join(f'{key}={value}'
+                                       for key, value in data.items())
+        return {
+            'route': name,
+            'url': url,
+            'auth': name in AUTH_ROUTES,
+            'status': status,
+            'latency_ms': percentiles(latencies),
+            'queries': {'mean': round(statistics.mean(queries), 1),
+                        'max': max(queries)},
+            'bytes': max(sizes),
+        }
+
+    def print_report(self, results, compare):
+        baseline = {}
+        if compare:
+            with open(compare, encoding='utf-8') as stream:
+                baseline = {result['url']: result
+                            for result in json.load(stream)['results']}
+        for result in results:
+            latency = result['latency_ms']
+            line = (f'{result["url"]:45} {result["status"]} '
+                    f'p50/p95/p99 {latency["p50"]}/{latency["p95"]}/'
+                    f'{latency["p99"]} ms  '
+                    f'{result["queries"]["mean"]} q  {result["bytes"]} B')
+            previous = baseline.get(result['url'])
+            if previous and previous['latency_ms']['p50']:
+                change = (latency['p50'] / previous['latency_ms']['p50']
+                          - 1) * 100
+                line += f'  p50 {change:+.0f}%'
+            self.stdout.write(line)
@@ -0,0 +1,133 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.bench import StatementTimer, percentiles, run_threads
+from core.db import current_pragmas, sqlite_pragmas
+
+User = get_user_model()
+
+BENCH_USERNAME = 'bench_sqlite'
+# «до»: журнал отката и настройки SQLite по умолчанию
+DEFAULT_PRAGMAS = {'journal_mode': 'delete'}
+REPORTED_PRAGMAS = ('journal_mode', 'synchronous', 'busy_timeout',
+                    'cache_size', 'mmap_size')
+
+
+class Command(BaseCommand):
+    help = ('Читатели posts:index параллельно с писателями post_create: '
+            'пропускная способность и перцентили ожидания блокировок '
+            'с PRAGMA по умолчанию и из settings.SQLITE_PRAGMAS.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--duration', type=float, default=10,
+                            help='Секунд на каждый прогон')
+        parser.add_argument('--only', choices=('before', 'after'),
+                            help='Выполнить только один прогон')
+        parser.add_argument('--json', action='store_true',
+                            help='Вывести результаты одним JSON')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Бенчмарк рассчитан на SQLite')
+        if connection.settings_dict['NAME'] in ('', ':memory:'):
+            raise CommandError('Нужна база в файле, а не в памяти')
+        runs = {'before': DEFAULT_PRAGMAS, 'after': sqlite_pragmas()}
+        if options['only']:
+            runs = {options['only']: runs[options['only']]}
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        report = {}
+        try:
+            for name, pragmas in runs.items():
+                with override_settings(SQLITE_PRAGMAS=pragmas):
+                    connections.close_all()
+                    report[name] = self.run(user, options)
+        finally:
+            connections.close_all()
+            # посты бенчмарка удаляются каскадом вместе с пользователем
+            user.delete()
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for name, result in report.items():
+            self.print_run(name, result)
+
+    def run(self, user, options):
+        index = reverse('posts:index')
+        create = reverse('posts:post_create')
+
+        def reader(deadline):
+            client = Client()
+            client.force_login(user)
+            return self.loop(deadline, lambda: client.get(index))
+
+        def writer(deadline):
+            client = Client()
+            client.force_login(user)
+            counter = iter(range(10 ** 9))
+            return self.loop(deadline, lambda: client.post(
+                create, {'text': f'Бенчмарк {next(counter)}'}))
+
+        pragmas = current_pragmas(connection, REPORTED_PRAGMAS)
+        connections.close_all()
+        started = time.monotonic()
+        results = run_threads(
+            [reader] * options['readers'] + [writer] * options['writers'],
+            options['duration'])
+        elapsed = time.monotonic() - started
+        return {
+            'pragmas': pragmas,
+            'readers': self.summary(results[:options['readers']], elapsed),
+            'writers': self.summary(results[options['readers']:], elapsed),
+        }
+
+    @staticmethod
+    def loop(deadline, request):
+        timer = StatementTimer()
+        latencies = []
+        errors = 0
+        with connection.execute_wrapper(timer):
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    request()
+                except OperationalError:
+                    # "database is locked": busy_timeout истёк
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+        return latencies, timer.durations, errors
+
+    @staticmethod
+    def summary(results, elapsed):
+        latencies = [value for result in results for value in result[0]]
+        waits = [value for result in results for value in result[1]]
+        errors = sum(result[2] for result in results)
+        return {
+            'requests': len(latencies),
+            'errors': errors,
+            'throughput': round(len(latencies) / elapsed, 1),
+            'latency_ms': percentiles(latencies),
+            'lock_wait_ms': percentiles(waits),
+        }
+
+    def print_run(self, name, result):
+        pragmas = ', '.join(f'{key}={value}'
+                            for key, value in result['pragmas'].items())
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{name}: {pragmas}'))
+        for role in ('readers', 'writers'):
+            data = result[role]
+            latency = data['latency_ms']
+            wait = data['lock_wait_ms']
+            self.stdout.write(
+                f'  {role:8} {data["throughput"]:8} req/s  '
+                f'latency p50/p95/p99 {latency["p50"]}/{latency["p95"]}/'
+                f'{latency["p99"]} ms  '
+                f'lock wait p50/p95/p99 {wait["p50"]}/{wait["p95"]}/'
+                f'{wait["p99"]} ms  errors {data["errors"]}')
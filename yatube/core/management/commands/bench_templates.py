@@ -0,0 +1,129 @@
+import json
+import os
+import subprocess
+import sys
+from importlib import import_module
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from core.bench import (AUTH_ROUTES, iter_routes, percentiles, route_sample,
+                        route_variants)
+from core.template import warm_templates
+
+# выгрузки отдают CSV/JSONL без шаблонов
+SKIPPED_ROUTES = {'posts:group_export', 'posts:profile_export'}
+
+# дочерний процесс: старт воркера через wsgi и первые запросы
+COLD_START = '''
+import json, sys, time
+started = time.perf_counter()
+from yatube.wsgi import application
+booted = time.perf_counter()
+from django.test import Client
+client = Client()
+first = []
+for url in sys.argv[1:]:
+    request_started = time.perf_counter()
+    client.get(url)
+    first.append(time.perf_counter() - request_started)
+print(json.dumps({'boot': booted - started, 'first_requests': first}))
+'''
+
+
+def server_timing(response, name):
+    for part in response['Server-Timing'].split(', '):
+        metric, _, rest = part.partition(';dur=')
+        if metric == name:
+            return float(rest.split(';', 1)[0]) / 1000
+    return None
+
+
+class Command(BaseCommand):
+    help = ('Время рендера шаблонов по страницам и холодный старт воркера '
+            'с обычными и кеширующими загрузчиками шаблонов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--production-settings',
+                            default='yatube.settings_production')
+        parser.add_argument('--cold-urls', nargs='*',
+                            default=['/', '/auth/login/'],
+                            help='Первые запросы после старта воркера')
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        production = import_module(options['production_settings'])
+        configs = {
+            'default': (settings.TEMPLATES, False),
+            'cached': (production.TEMPLATES, True),
+        }
+        sample = route_sample()
+        report = {'render': {}, 'cold_start': {}}
+        for name, (templates, warm) in configs.items():
+            with override_settings(TEMPLATES=templates):
+                if warm:
+                    warm_templates(force=True)
+                report['render'][name] = self.render_times(sample, options)
+        for name, module in (('default', settings.SETTINGS_MODULE),
+                             ('cached', options['production_settings'])):
+            report['cold_start'][name] = self.cold_start(
+                module, options['cold_urls'])
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.print_report(report)
+
+    def render_times(self, sample, options):
+        """Время рендера из Server-Timing при пустом кеше фрагментов."""
+        results = {}
+        for name, params in iter_routes():
+            if name in SKIPPED_ROUTES or name == 'users:logout':
+                continue
+            for url, data in route_variants(name, params, sample):
+                client = Client()
+                if name in AUTH_ROUTES:
+                    client.force_login(sample['author'])
+                durations = []
+                for _ in range(options['repeat']):
+                    cache.clear()
+                    response = client.get(url, data)
+                    duration = server_timing(response, 'tpl')
+                    if duration:
+                        durations.append(duration)
+                if durations:
+                    key = url + ('?page=last' if data.get('page') else '')
+                    results[key] = percentiles(durations)
+        return results
+
+    def cold_start(self, module, urls):
+        environment = dict(os.environ, DJANGO_SETTINGS_MODULE=module)
+        finished = subprocess.run(
+            [sys.executable, '-c', COLD_START, *urls],
+            cwd=settings.BASE_DIR, env=environment,
+            capture_output=True, text=True)
+        if finished.returncode:
+            raise CommandError(finished.stderr)
+        result = json.loads(finished.stdout.strip().splitlines()[-1])
+        return {
+            'boot_ms': round(result['boot'] * 1000, 1),
+            'first_requests_ms': [round(value * 1000, 1)
+                                  for value in result['first_requests']],
+        }
+
+    def print_report(self, report):
+        default = report['render']['default']
+        cached = report['render']['cached']
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            'Рендер, p50 мс: обычные загрузчики → кеширующие'))
+        for url, timings in default.items():
+            after = cached.get(url, {}).get('p50')
+            self.stdout.write(f'  {url:45} {timings["p50"]} → {after}')
+        self.stdout.write(self.style.MIGRATE_HEADING('Холодный старт'))
+        for name, result in report['cold_start'].items():
+            first = ', '.join(str(value)
+                              for value in result['first_requests_ms'])
+            self.stdout.write(f'  {name:8} старт {result["boot_ms"]} мс, '
+                              f'первые запросы {first} мс')
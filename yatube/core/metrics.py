@@ -0,0 +1,127 @@
+import bisect
+import threading
+import time
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                    0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_local = threading.local()
+
+
+class Histogram:
+    """Гистограмма Prometheus с меткой view, безопасная для потоков."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, view, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(view)
+            if series is None:
+                # последний элемент — корзина +Inf
+                series = self.series[view] = {
+                    'counts': [0] * (len(self.buckets) + 1), 'sum': 0}
+            series['counts'][index] += 1
+            series['sum'] += value
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.help_text}',
+                 f'# TYPE {self.name} histogram']
+        with self.lock:
+            snapshot = {view: (list(series['counts']), series['sum'])
+                        for view, series in self.series.items()}
+        for view, (counts, total) in sorted(snapshot.items()):
+            label = view.replace('\\', '\\\\').replace('"', '\\"')
+            cumulative = 0
+            bounds = [repr(float(bound)) for bound in self.buckets]
+            for bound, count in zip(bounds + ['+Inf'], counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{view="{label}",'
+                             f'le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{view="{label}"}} {total}')
+            lines.append(f'{self.name}_count{{view="{label}"}} {cumulative}')
+        return lines
+
+    def clear(self):
+        with self.lock:
+            self.series.clear()
+
+
+REQUEST_DURATION = Histogram(
+    'yatube_request_duration_seconds', 'Полное время обработки запроса',
+    DURATION_BUCKETS)
+DB_DURATION = Histogram(
+    'yatube_db_duration_seconds', 'Время запросов к базе за запрос',
+    DURATION_BUCKETS)
+DB_QUERIES = Histogram(
+    'yatube_db_queries', 'Число запросов к базе за запрос', QUERY_BUCKETS)
+TEMPLATE_DURATION = Histogram(
+    'yatube_template_duration_seconds', 'Время рендера шаблонов за запрос',
+    DURATION_BUCKETS)
+RESPONSE_SIZE = Histogram(
+    'yatube_response_size_bytes', 'Размер тела ответа', SIZE_BUCKETS)
+
+HISTOGRAMS = (REQUEST_DURATION, DB_DURATION, DB_QUERIES, TEMPLATE_DURATION,
+              RESPONSE_SIZE)
+
+
+class RequestTimings:
+    """Замеры одного запроса; он же execute_wrapper для времени базы."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = None
+        self.db_time = 0
+        self.queries = 0
+        self.template_time = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def current_timings():
+    """Замеры запроса, который обрабатывает текущий поток, или None."""
+    return getattr(_local, 'timings', None)
+
+
+def set_current_timings(timings):
+    _local.timings = timings
+
+
+def record_template_time(duration):
+    timings = current_timings()
+    if timings is not None:
+        timings.template_time += duration
+
+
+def observe(timings, total, size=None):
+    view = timings.view or 'unresolved'
+    REQUEST_DURATION.observe(view, total)
+    DB_DURATION.observe(view, timings.db_time)
+    DB_QUERIES.observe(view, timings.queries)
+    TEMPLATE_DURATION.observe(view, timings.template_time)
+    if size is not None:
+        RESPONSE_SIZE.observe(view, size)
+
+
+def expose():
+    """Все гистограммы в текстовом формате Prometheus."""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines += histogram.expose()
+    return '\n'.join(lines) + '\n'
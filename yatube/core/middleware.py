@@ -0,0 +1,53 @@
+from django.db import connection
+
+from .metrics import RequestTimings, observe, set_current_timings
+from .slow_queries import slow_query_log
+
+
+class InstrumentationMiddleware:
+    """Время запроса, базы и шаблонов по имени view.
+
+    Пишет заголовок Server-Timing и гистограммы для /metrics.
+    Стоит первым в MIDDLEWARE, чтобы учитывать и остальные middleware.
+    Для потоковых ответов время не включает отдачу тела, а размер
+    не записывается.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = request.timings = RequestTimings()
+        set_current_timings(timings)
+        try:
+            with connection.execute_wrapper(timings):
+                response = self.get_response(request)
+        finally:
+            set_current_timings(None)
+        total = timings.elapsed()
+        size = None if response.streaming else len(response.content)
+        observe(timings, total, size)
+        response['Server-Timing'] = ', '.join((
+            f'total;dur={total * 1000:.1f}',
+            f'db;dur={timings.db_time * 1000:.1f};'
+            f'desc="{timings.queries} queries"',
+            f'tpl;dur={timings.template_time * 1000:.1f}',
+        ))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.timings.view = request.resolver_match.view_name
+
+
+class SlowQueryLogMiddleware:
+    """Подключает журнал медленных запросов на время обработки запроса."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with connection.execute_wrapper(slow_query_log):
+            response = self.get_response(request)
+        # сводка уходит и тогда, когда медленных запросов больше нет
+        slow_query_log.flush_if_due()
+        return response
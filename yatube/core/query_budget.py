@@ -0,0 +1,64 @@
+import contextlib
+import functools
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+_exempt = threading.local()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """execute_wrapper, считающий запросы к базе."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not getattr(_exempt, 'depth', 0):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextlib.contextmanager
+def budget_exempt():
+    """Не засчитывает в бюджет редкие служебные запросы вроде
+    перестройки кешей, которые выпадают случайному запросу."""
+    _exempt.depth = getattr(_exempt, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _exempt.depth -= 1
+
+
+def query_budget(max_queries):
+    """Ограничивает число запросов к базе, которое может сделать view.
+
+    При QUERY_BUDGET_STRICT превышение бросает QueryBudgetExceeded,
+    иначе пишет предупреждение в лог. Бюджет доступен как
+    view.query_budget — его проверяет QueryBudgetTestMixin.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                response = view(request, *args, **kwargs)
+            if counter.count > max_queries:
+                message = (f'{view.__module__}.{view.__name__}: '
+                           f'{counter.count} queries, '
+                           f'budget is {max_queries}')
+                if settings.QUERY_BUDGET_STRICT:
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+            return response
+        wrapper.query_budget = max_queries
+        return wrapper
+    return decorator
@@ -0,0 +1,145 @@
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+from django.conf import settings
+
+from .metrics import current_timings
+
+logger = logging.getLogger(__name__)
+
+# списки IN (%s, %s, ...) разной длины и числа в тексте — одна форма
+IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+NUMBER = re.compile(r'\b\d+\b')
+# свои обёртки над execute в поиске места вызова не интересны
+CORE_DIR = os.path.dirname(os.path.abspath(__file__))
+SKIPPED_FILES = {
+    os.path.join(CORE_DIR, name) for name in (
+        'slow_queries.py', 'metrics.py', 'middleware.py', 'query_budget.py',
+        'template.py')
+}
+
+
+def sql_shape(sql):
+    return NUMBER.sub('?', IN_LIST.sub('(%s...)', ' '.join(sql.split())))
+
+
+def call_site():
+    """Первый кадр кода проекта и строка шаблона, из-за которых пошёл запрос.
+
+    Строка шаблона берётся из самого глубокого узла, который рендерился
+    в момент запроса, — например {{ author.posts.count }}.
+    """
+    frame = sys._getframe(2)
+    code_frame = template_line = None
+    base_dir = settings.BASE_DIR + os.sep
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (template_line is None
+                and frame.f_code.co_name == 'render_annotated'):
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                template_line = (f'{origin.template_name or origin.name}:'
+                                 f'{token.lineno}')
+        if (code_frame is None and filename.startswith(base_dir)
+                and filename not in SKIPPED_FILES
+                and 'site-packages' not in filename):
+            code_frame = (f'{os.path.relpath(filename, settings.BASE_DIR)}:'
+                          f'{frame.f_lineno} in {frame.f_code.co_name}')
+        if code_frame is not None and template_line is not None:
+            break
+        frame = frame.f_back
+    return code_frame, template_line
+
+
+def describe_value(value):
+    name = type(value).__name__
+    if isinstance(value, (str, bytes, bytearray, list, tuple)):
+        return f'{name}[{len(value)}]'
+    return name
+
+
+def describe_params(params):
+    """Типы и длины параметров вместо значений.
+
+    В параметрах бывают хеши паролей, email и данные сессий — в лог
+    они попадать не должны.
+    """
+    if not params:
+        return '-'
+    if isinstance(params, dict):
+        return ', '.join(f'{key}={describe_value(value)}'
+                         for key, value in params.items())
+    return ', '.join(describe_value(value) for value in params)
+
+
+class SlowQueryLog:
+    """execute_wrapper, записывающий запросы дольше порога.
+
+    Первый медленный запрос каждой формы SQL за интервал пишется целиком,
+    повторы только копятся и раз в SLOW_QUERY_SUMMARY_INTERVAL секунд
+    уходят в лог одной строкой сводки на форму.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.shapes = {}
+        self.window_started = time.monotonic()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+                self.record(sql, params, duration)
+
+    def record(self, sql, params, duration):
+        timings = current_timings()
+        view = timings.view if timings is not None else None
+        code_frame, template_line = call_site()
+        shape = sql_shape(sql)
+        with self.lock:
+            stats = self.shapes.get(shape)
+            if stats is None:
+                # view первого запроса тоже попадает в сводку повторов
+                self.shapes[shape] = {'count': 0, 'total': 0, 'max': 0,
+                                      'views': {view}}
+            else:
+                stats['count'] += 1
+                stats['total'] += duration
+                stats['max'] = max(stats['max'], duration)
+                stats['views'].add(view)
+        if stats is None:
+            logger.warning(
+                'Медленный запрос %.1f мс, view %s, код %s, шаблон %s: '
+                '%s; параметры %s', duration * 1000, view, code_frame,
+                template_line, sql, describe_params(params))
+        self.flush_if_due()
+
+    def flush_if_due(self):
+        if (time.monotonic() - self.window_started
+                >= settings.SLOW_QUERY_SUMMARY_INTERVAL):
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            shapes, self.shapes = self.shapes, {}
+            self.window_started = time.monotonic()
+        for shape, stats in shapes.items():
+            if not stats['count']:
+                continue
+            views = ', '.join(sorted(str(view) for view in stats['views']))
+            logger.warning(
+                'Повторы медленного запроса: ещё %d раз, всего %.1f мс, '
+                'максимум %.1f мс, view %s: %s', stats['count'],
+                stats['total'] * 1000, stats['max'] * 1000, views, shape)
+
+
+slow_query_log = SlowQueryLog()
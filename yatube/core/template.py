@@ -0,0 +1,74 @@
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates, Template
+from django.template.utils import get_app_template_dirs
+
+from .metrics import record_template_time
+
+logger = logging.getLogger(__name__)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            record_template_time(time.perf_counter() - started)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates, засекающий рендер шаблонов верхнего уровня.
+
+    Вложенные include и extends рендерятся внутри движка и входят
+    во время своего родителя, поэтому не считаются дважды.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template,
+                             self)
+
+
+def template_names(engine):
+    """Имена всех .html-шаблонов из DIRS и каталогов templates приложений."""
+    names = set()
+    directories = list(engine.dirs)
+    if engine.app_dirs or any('app_directories' in str(loader)
+                              for loader in engine.loaders):
+        directories += get_app_template_dirs('templates')
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith('.html'):
+                    names.add(os.path.relpath(
+                        os.path.join(root, filename), directory))
+    return sorted(name.replace(os.sep, '/') for name in names)
+
+
+def warm_templates(force=False):
+    """Загружает все шаблоны в кеширующий загрузчик при старте воркера.
+
+    Без TEMPLATE_WARMUP (или force) ничего не делает; сломанные шаблоны
+    не мешают старту, ошибка проявится при их рендере.
+    """
+    if not (force or settings.TEMPLATE_WARMUP):
+        return 0
+    warmed = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for name in template_names(backend.engine):
+            try:
+                backend.engine.get_template(name)
+            except TemplateSyntaxError:
+                logger.warning('Шаблон %s не прогрет', name, exc_info=True)
+                continue
+            warmed += 1
+    return warmed
@@ -0,0 +1,13 @@
+from django import template
+from django.conf import settings
+
+register = template.Library()
+
+
+@register.filter
+def page_window(page_obj):
+    """Номера страниц вокруг текущей вместо всего page_range."""
+    window = settings.PAGINATOR_WINDOW
+    first = max(page_obj.number - window, 1)
+    last = min(page_obj.number + window, page_obj.paginator.num_pages)
+    return range(first, last + 1)
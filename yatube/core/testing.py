@@ -0,0 +1,27 @@
+from urllib.parse import urlsplit
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from .query_budget import QueryCounter
+
+
+class QueryBudgetTestMixin:
+    """Проверка, что запрос к view укладывается в его query_budget."""
+
+    def assertWithinQueryBudget(self, client, url, method='get', **kwargs):
+        view = resolve(urlsplit(url).path).func
+        budget = getattr(view, 'query_budget', None)
+        self.assertIsNotNone(
+            budget, f'У view для {url} не задан @query_budget')
+        # считает как сам @query_budget: без запросов под budget_exempt
+        counter = QueryCounter()
+        with CaptureQueriesContext(connection) as queries:
+            with connection.execute_wrapper(counter):
+                response = getattr(client, method)(url, **kwargs)
+        sql = '\n'.join(query['sql'] for query in queries.captured_queries)
+        self.assertLessEqual(
+            counter.count, budget,
+            f'{url}: {counter.count} запросов при бюджете {budget}\n{sql}')
+        return response
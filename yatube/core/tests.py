@@ -0,0 +1,277 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http import HTTPStatus
+from importlib import import_module
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .bench import percentiles
+from .cache import LOCK_PREFIX, fetch
+from .db import current_pragmas, sqlite_pragmas
+from .metrics import HISTOGRAMS
+from .slow_queries import slow_query_log, sql_shape
+from .template import template_names, warm_templates
+
+User = get_user_model()
+
+
+class SqlitePragmaTests(TestCase):
+    def test_connection_uses_settings_pragmas(self):
+        values = current_pragmas(
+            connection, ('synchronous', 'busy_timeout', 'cache_size'))
+        # synchronous=NORMAL SQLite возвращает числом
+        self.assertEqual(values, {'synchronous': 1, 'busy_timeout': 5000,
+                                  'cache_size': -20000})
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout; DROP': 1})
+    def test_invalid_pragma_is_rejected(self):
+        with self.assertRaises(ValueError):
+            sqlite_pragmas()
+
+
+class PercentileTests(TestCase):
+    def test_nearest_rank(self):
+        values = [number / 1000 for number in range(1, 101)]
+        self.assertEqual(percentiles(values),
+                         {'p50': 50.0, 'p95': 95.0, 'p99': 99.0})
+        self.assertEqual(percentiles([]),
+                         {'p50': None, 'p95': None, 'p99': None})
+
+
+class BenchRoutesCommandTests(TestCase):
+    def test_every_route_is_measured(self):
+        call_command('seed_bench', '--posts', '30', '--users', '3',
+                     '--groups', '2', stdout=StringIO())
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.json')
+            call_command('bench_routes', '--repeat', '1', '--output', path,
+                         stdout=StringIO())
+            with open(path, encoding='utf-8') as stream:
+                report = json.load(stream)
+        routes = {result['route'] for result in report['results']}
+        for name in ('posts:index', 'posts:post_edit', 'users:login',
+                     'about:tech'):
+            self.assertIn(name, routes)
+        for result in report['results']:
+            self.assertEqual(result['status'], 200, result['url'])
+            self.assertGreater(result['bytes'], 0)
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        for histogram in HISTOGRAMS:
+            histogram.clear()
+        cache.clear()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('posts:index'))
+        timing = dict(part.split(';', 1)[0:2] for part in
+                      response['Server-Timing'].split(', '))
+        self.assertEqual(set(timing), {'total', 'db', 'tpl'})
+        self.assertIn('queries"', timing['db'])
+        self.assertNotEqual(timing['tpl'], 'dur=0.0')
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get('/no-such-page/')
+        response = self.client.get(reverse('metrics'))
+        content = response.content.decode()
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram',
+                      content)
+        self.assertIn('yatube_db_queries_count{view="posts:index"} 1',
+                      content)
+        self.assertIn('yatube_response_size_bytes_bucket{view="posts:index",'
+                      'le="+Inf"} 1', content)
+        self.assertIn('view="unresolved"', content)
+
+    def test_metrics_are_private(self):
+        response = self.client.get(reverse('metrics'),
+                                   REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_SUMMARY_INTERVAL=3600)
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        slow_query_log.flush()
+        self.user = User.objects.create_user(username='den')
+        self.client.force_login(self.user)
+
+    def test_sql_shape_ignores_literals_and_list_length(self):
+        self.assertEqual(
+            sql_shape('SELECT * FROM t WHERE id IN (%s, %s)  LIMIT 21'),
+            sql_shape('SELECT * FROM t WHERE id IN (%s) LIMIT 3'))
+
+    def test_queries_are_attributed_to_view_and_template(self):
+        url = reverse('posts:profile', kwargs={'username': 'den'})
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            self.client.get(url)
+        output = '\n'.join(logs.output)
+        self.assertIn('view posts:profile', output)
+        self.assertIn('код posts/lookups.py:', output)
+
+    def test_template_queries_point_to_template_line(self):
+        template = engines['django'].from_string(
+            '{{ author.username }}\n{{ author.posts.count }}')
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            with connection.execute_wrapper(slow_query_log):
+                template.render({'author': self.user})
+        self.assertIn('шаблон <unknown source>:2', logs.output[0])
+        self.assertIn('код core/tests.py:', logs.output[0])
+
+    def test_parameter_values_are_not_logged(self):
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            with connection.execute_wrapper(slow_query_log):
+                User.objects.filter(email='secret@example.com',
+                                    pk=7).exists()
+        self.assertNotIn('secret@example.com', logs.output[0])
+        self.assertIn('параметры str[18], int', logs.output[0])
+
+    def test_summary_names_view_of_first_query(self):
+        requests = [SimpleNamespace(view='posts:index'),
+                    SimpleNamespace(view='posts:profile')]
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            with mock.patch('core.slow_queries.current_timings',
+                            side_effect=requests):
+                slow_query_log.record('SELECT 1', [], 1.0)
+                slow_query_log.record('SELECT 1', [], 1.0)
+            slow_query_log.flush()
+        self.assertIn('view posts:index, posts:profile', logs.output[-1])
+
+    def test_repeats_are_summarized(self):
+        url = reverse('posts:profile', kwargs={'username': 'den'})
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            self.client.get(url)
+        first = len(logs.output)
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            self.client.get(url)
+            self.client.get(url)
+            slow_query_log.flush()
+        self.assertTrue(all('Повторы' in line for line in logs.output))
+        self.assertLessEqual(len(logs.output), first)
+
+
+class TemplateWarmupTests(TestCase):
+    def test_production_profile_uses_cached_loader(self):
+        production = import_module('yatube.settings_production')
+        with override_settings(TEMPLATES=production.TEMPLATES):
+            engine = engines['django'].engine
+            self.assertEqual(warm_templates(), 0)
+            self.assertGreater(warm_templates(force=True), 0)
+            loader = engine.template_loaders[0]
+            self.assertIsInstance(loader, CachedLoader)
+            for name in ('posts/index.html', 'includes/header.html',
+                         'users/login.html', 'admin/base.html'):
+                self.assertIn(name, template_names(engine))
+            self.assertTrue(loader.get_template_cache)
+
+
+class ProductionSettingsTests(TestCase):
+    def test_cache_is_shared_between_processes(self):
+        config = import_module('yatube.settings_production').CACHES['default']
+        # LocMemCache у каждого процесса свой
+        self.assertEqual(config['BACKEND'],
+                         'django.core.cache.backends.memcached.MemcachedCache')
+        self.assertTrue(config['LOCATION'])
+
+
+class FetchTests(TestCase):
+    """Один сборщик на ключ и устаревшие записи на время пересборки."""
+
+    def setUp(self):
+        cache.clear()
+        self.calls = []
+
+    def build(self, value='новое', delay=0):
+        def build():
+            self.calls.append(value)
+            time.sleep(delay)
+            return value
+        return build
+
+    def test_concurrent_misses_build_once(self):
+        results = []
+
+        def request():
+            results.append(fetch('key', self.build(delay=0.2), 60)[0])
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        with override_settings(CACHE_LOCK_WAIT=5):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(self.calls, ['новое'])
+        self.assertEqual(results, ['новое'] * 8)
+
+    def test_stale_value_is_served_while_locked(self):
+        fetch('key', self.build('старое'), 0)
+        cache.add(LOCK_PREFIX + 'key', True)
+        self.assertEqual(fetch('key', self.build(), 60), ('старое', True))
+        cache.delete(LOCK_PREFIX + 'key')
+        self.assertEqual(fetch('key', self.build(), 60), ('новое', False))
+        self.assertEqual(self.calls, ['старое', 'новое'])
+
+    def test_stale_entry_expires_after_hard_ttl(self):
+        fetch('key', self.build('старое'), 0, stale_timeout=0.2)
+        cache.add(LOCK_PREFIX + 'key', True)
+        with override_settings(CACHE_LOCK_WAIT=0):
+            time.sleep(0.3)
+            self.assertEqual(fetch('key', self.build(), 60),
+                             ('новое', False))
+
+    def test_is_fresh_rejects_value(self):
+        fetch('key', self.build('старое'), 60)
+        value, hit = fetch('key', self.build(), 60,
+                           is_fresh=lambda value: value != 'старое')
+        self.assertEqual((value, hit), ('новое', False))
+
+    def test_probabilistic_early_expiration(self):
+        fetch('key', self.build('старое', delay=0.05), 1)
+        with mock.patch('core.cache.random.random', return_value=0.0):
+            self.assertEqual(fetch('key', self.build(), 1)[0], 'старое')
+        # -log(1 - u) при u -> 1 растёт без предела: 0.05 * 27.6 > 1
+        with mock.patch('core.cache.random.random',
+                        return_value=1 - 1e-12):
+            self.assertEqual(fetch('key', self.build(), 1)[0], 'новое')
+
+    def test_none_is_not_cached(self):
+        fetch('key', lambda: None, 60)
+        self.assertEqual(fetch('key', self.build(), 60), ('новое', False))
+
+
+class FileBasedFetchTests(FetchTests):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings = override_settings(CACHES={'default': {
+            'BACKEND': 'core.cache.FileBasedCache',
+            'LOCATION': directory,
+        }})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        super().setUp()
+
+    def test_add_replaces_only_expired_entries(self):
+        self.assertTrue(cache.add('lock', 1, 60))
+        self.assertFalse(cache.add('lock', 2, 60))
+        self.assertTrue(cache.add('expired', 1, 0.1))
+        time.sleep(0.2)
+        self.assertTrue(cache.add('expired', 2, 60))
+        self.assertEqual((cache.get('lock'), cache.get('expired')), (1, 2))
+        self.assertEqual(len(os.listdir(cache._dir)), 2)
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+
+from .metrics import expose
+
+
+def metrics(request):
+    """Гистограммы в текстовом формате Prometheus для сборщика метрик."""
+    allowed = settings.METRICS_ALLOWED_IPS
+    if allowed is not None and request.META.get('REMOTE_ADDR') not in allowed:
+        raise PermissionDenied
+    return HttpResponse(expose(),
+                        content_type='text/plain; version=0.0.4; '
+                                     'charset=utf-8')
@@ -0,0 +1,25 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from core.admin import LargeTableAdminMixin
+
+from .models import Job
+
+
+class JobAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'attempts', 'max_attempts',
+                    'run_after', 'locked_by')
+    list_filter = ('status',)
+    search_fields = ('name',)
+    readonly_fields = ('locked_until', 'locked_by', 'last_error',
+                       'created_at')
+    actions = ('retry',)
+
+    def retry(self, request, queryset):
+        retried = queryset.filter(status=Job.FAILED).update(
+            status=Job.QUEUED, attempts=0, run_after=timezone.now())
+        self.message_user(request, f'Снова в очереди: {retried}')
+    retry.short_description = 'Повторить упавшие'
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .queue import enqueue, task
+
+
+def serialize(message):
+    if message.attachments:
+        raise ValueError('Вложения через очередь писем не отправляются')
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+        'content_subtype': message.content_subtype,
+    }
+
+
+@task
+def send_email(data):
+    data = dict(data)
+    alternatives = data.pop('alternatives')
+    content_subtype = data.pop('content_subtype')
+    message = EmailMultiAlternatives(
+        **data, alternatives=[tuple(item) for item in alternatives],
+        connection=get_connection(settings.JOBS_EMAIL_BACKEND))
+    message.content_subtype = content_subtype
+    message.send()
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Почтовый бэкенд, который только ставит письма в очередь.
+
+    View возвращает ответ, не дожидаясь SMTP или диска; письмо
+    отправляет воркер через JOBS_EMAIL_BACKEND, повторяя при сбоях.
+    """
+
+    def send_messages(self, email_messages):
+        count = 0
+        for message in email_messages:
+            if message.recipients():
+                enqueue(send_email, serialize(message))
+                count += 1
+        return count
@@ -0,0 +1,100 @@
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection, connections
+
+from jobs.queue import claim, execute
+
+logger = logging.getLogger(__name__)
+
+
+def work(number, stop, poll_interval, once):
+    """Цикл одного воркера: взять задачу, выполнить, иначе подождать."""
+    worker = f'{socket.gethostname()}:{os.getpid()}:{number}'
+    try:
+        while not stop.is_set():
+            try:
+                job = claim(worker)
+                if job is not None:
+                    execute(job)
+                elif once:
+                    break
+                else:
+                    stop.wait(poll_interval)
+            except Exception:
+                # база занята или недоступна — повторим после паузы
+                logger.exception('Воркер %s: сбой очереди', worker)
+                stop.wait(poll_interval)
+            finally:
+                close_old_connections()
+    finally:
+        connection.close()
+
+
+def work_in_process(number, stop, poll_interval, once):
+    # Ctrl+C получает вся группа процессов, останавливает их родитель
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    work(number, stop, poll_interval, once)
+
+
+class Command(BaseCommand):
+    help = ('Выполняет фоновые задачи из очереди jobs пулом потоков или '
+            'процессов. SIGINT/SIGTERM дают воркерам закончить текущую '
+            'задачу.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int,
+                            default=settings.JOBS_CONCURRENCY,
+                            help='Сколько задач выполнять одновременно')
+        parser.add_argument('--pool', choices=('thread', 'process'),
+                            default='thread',
+                            help='Потоки или процессы (только fork, Unix)')
+        parser.add_argument('--poll-interval', type=float,
+                            default=settings.JOBS_POLL_INTERVAL,
+                            help='Пауза в секундах, когда очередь пуста')
+        parser.add_argument('--once', action='store_true',
+                            help='Выйти, когда готовых задач не останется')
+
+    def handle(self, *args, **options):
+        if options['pool'] == 'process':
+            context = multiprocessing.get_context('fork')
+            stop = context.Event()
+            # дочерние процессы не должны делить открытое соединение
+            connections.close_all()
+            workers = [context.Process(
+                target=work_in_process,
+                args=(number, stop, options['poll_interval'],
+                      options['once']))
+                for number in range(options['concurrency'])]
+        else:
+            stop = threading.Event()
+            workers = [threading.Thread(
+                target=work, name=f'jobs-{number}',
+                args=(number, stop, options['poll_interval'],
+                      options['once']))
+                for number in range(options['concurrency'])]
+
+        def shutdown(signum, frame):
+            stop.set()
+
+        previous = {signum: signal.signal(signum, shutdown)
+                    for signum in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            self.stdout.write(
+                f'Воркеров: {len(workers)} ({options["pool"]})')
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                # join с таймаутом, чтобы главный поток принимал сигналы
+                while worker.is_alive():
+                    worker.join(1)
+        finally:
+            stop.set()
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
@@ -0,0 +1,45 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Фоновая задача: функция, отмеченная @task, и её аргументы.
+
+    Строка создаётся в транзакции вызывающего кода, поэтому воркер
+    видит задачу только после её коммита. Взятая задача невидима для
+    других воркеров до locked_until; если воркер умер, по истечении
+    этого срока задачу заберёт другой.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Не выполнена'),
+    )
+
+    name = models.CharField('Функция', max_length=200)
+    payload = models.TextField('Аргументы в JSON', default='{}')
+    status = models.CharField('Статус', max_length=10, choices=STATUSES,
+                              default=QUEUED)
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveIntegerField('Максимум попыток')
+    run_after = models.DateTimeField('Не раньше', default=timezone.now)
+    locked_until = models.DateTimeField('Занята до', null=True, blank=True)
+    locked_by = models.CharField('Воркер', max_length=100, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+
+    class Meta:
+        ordering = ('run_after', 'pk')
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            # выборка готовых задач: status = ? AND run_after <= ?
+            models.Index(fields=['status', 'run_after'],
+                         name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
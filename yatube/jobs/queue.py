@@ -0,0 +1,137 @@
+import json
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.query_budget import budget_exempt
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def task(func=None, *, max_attempts=None):
+    """Разрешает ставить функцию в очередь.
+
+    Воркер импортирует функцию по пути module.name и выполняет только
+    отмеченные этим декоратором — строка в базе не может вызвать
+    произвольный код. Аргументы должны сериализоваться в JSON.
+    """
+    def decorator(func):
+        func.job_name = f'{func.__module__}.{func.__qualname__}'
+        func.job_max_attempts = max_attempts
+        return func
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def enqueue(func, *args, delay=0, **kwargs):
+    """Ставит вызов func(*args, **kwargs) в очередь и возвращает Job.
+
+    Строка пишется в текущей транзакции: откат отменяет и задачу.
+    При JOBS_EAGER функция выполняется сразу в этом потоке, а её
+    запросы не входят в бюджет view.
+    """
+    name = getattr(func, 'job_name', None)
+    if name is None:
+        raise ValueError(f'{func!r} не отмечена @task')
+    payload = json.dumps({'args': args, 'kwargs': kwargs})
+    if settings.JOBS_EAGER:
+        data = json.loads(payload)
+        with budget_exempt():
+            func(*data['args'], **data['kwargs'])
+        return None
+    return Job.objects.create(
+        name=name, payload=payload,
+        max_attempts=func.job_max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_after=timezone.now() + timedelta(seconds=delay))
+
+
+def backoff(attempts):
+    """Пауза перед повтором: экспонента с равномерным разбросом.
+
+    Разброс не даёт задачам, упавшим вместе, вместе и повториться.
+    """
+    delay = min(settings.JOBS_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+                settings.JOBS_RETRY_MAX_DELAY)
+    return random.uniform(delay / 2, delay)
+
+
+def ready(now):
+    """Задачи, которые можно взять: очередные и брошенные воркерами."""
+    return Job.objects.filter(
+        Q(status=Job.QUEUED, run_after__lte=now)
+        | Q(status=Job.RUNNING, locked_until__lte=now))
+
+
+def claim(worker):
+    """Берёт одну готовую задачу или возвращает None.
+
+    Блокировок строк нет: кандидата забирает условный UPDATE, который
+    повторяет условие выборки. Из нескольких воркеров строку обновит
+    только один, остальные переходят к следующему кандидату.
+    """
+    now = timezone.now()
+    candidates = list(ready(now).order_by('run_after', 'pk')
+                      .values_list('pk', flat=True)[:10])
+    locked_until = now + timedelta(seconds=settings.JOBS_VISIBILITY_TIMEOUT)
+    for pk in candidates:
+        taken = ready(now).filter(pk=pk).update(
+            status=Job.RUNNING, locked_until=locked_until,
+            locked_by=worker, attempts=F('attempts') + 1)
+        if taken:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def execute(job):
+    """Выполняет взятую задачу.
+
+    Успешная задача удаляется, упавшая возвращается в очередь с паузой
+    backoff, после max_attempts попыток остаётся со статусом failed.
+    Если задачу успели забрать по таймауту видимости, её строку этот
+    воркер уже не трогает.
+    """
+    mine = Job.objects.filter(pk=job.pk, status=Job.RUNNING,
+                              locked_by=job.locked_by)
+    try:
+        func = import_string(job.name)
+        if getattr(func, 'job_name', None) != job.name:
+            raise ImportError(f'{job.name} не отмечена @task')
+        data = json.loads(job.payload)
+        func(*data['args'], **data['kwargs'])
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.error('Задача %s не выполнена за %s попыток', job,
+                         job.attempts, exc_info=True)
+            mine.update(status=Job.FAILED, locked_until=None,
+                        last_error=error)
+            return False
+        logger.warning('Задача %s упала, попытка %s из %s', job,
+                       job.attempts, job.max_attempts, exc_info=True)
+        mine.update(status=Job.QUEUED, locked_until=None, last_error=error,
+                    run_after=timezone.now() + timedelta(
+                        seconds=backoff(job.attempts)))
+        return False
+    mine.delete()
+    return True
+
+
+def run_pending(worker='inline', limit=None):
+    """Выполняет готовые задачи в текущем потоке, пока они есть."""
+    done = 0
+    while limit is None or done < limit:
+        job = claim(worker)
+        if job is None:
+            break
+        execute(job)
+        done += 1
+    return done
@@ -0,0 +1,130 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Job
+from .queue import claim, enqueue, execute, run_pending, task
+
+User = get_user_model()
+
+CALLS = []
+
+
+@task
+def remember(value, suffix=''):
+    CALLS.append(f'{value}{suffix}')
+
+
+@task(max_attempts=2)
+def explode():
+    raise RuntimeError('сбой')
+
+
+def not_a_task():
+    pass
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueued_call_runs_with_its_arguments(self):
+        enqueue(remember, 'пост', suffix='!')
+        self.assertEqual(CALLS, [])
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(CALLS, ['пост!'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_only_tasks_can_be_enqueued(self):
+        with self.assertRaises(ValueError):
+            enqueue(not_a_task)
+        job = Job.objects.create(name='jobs.tests.not_a_task',
+                                 max_attempts=1)
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    def test_rollback_cancels_job(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                enqueue(remember, 'пост')
+                raise RuntimeError
+        self.assertFalse(Job.objects.exists())
+
+    def test_delayed_job_waits(self):
+        enqueue(remember, 'пост', delay=60)
+        self.assertEqual(run_pending(), 0)
+
+    def test_failed_job_is_retried_with_backoff_then_given_up(self):
+        job = enqueue(explode)
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertFalse(execute(claim('worker')))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn('RuntimeError', job.last_error)
+        self.assertIsNone(claim('worker'))
+        Job.objects.update(run_after=timezone.now())
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            execute(claim('worker'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_abandoned_job_is_taken_after_visibility_timeout(self):
+        enqueue(remember, 'пост')
+        stale = claim('first')
+        self.assertIsNone(claim('second'))
+        Job.objects.update(locked_until=timezone.now() - timedelta(1))
+        job = claim('second')
+        self.assertEqual((job.locked_by, job.attempts), ('second', 2))
+        # первый воркер очнулся: задача уже не его
+        execute(stale)
+        self.assertTrue(Job.objects.filter(pk=job.pk).exists())
+        execute(job)
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(CALLS, ['пост', 'пост'])
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode_runs_immediately(self):
+        self.assertIsNone(enqueue(remember, 'пост'))
+        self.assertEqual(CALLS, ['пост'])
+
+
+@override_settings(
+    EMAIL_BACKEND='jobs.mail.QueuedEmailBackend',
+    JOBS_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class QueuedEmailTests(TestCase):
+    def test_password_reset_email_is_sent_by_worker(self):
+        User.objects.create_user(username='den', email='den@example.com',
+                                 password='password')
+        response = self.client.post(reverse('password_reset'),
+                                    {'email': 'den@example.com'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['den@example.com'])
+        self.assertIn('/auth/reset/', mail.outbox[0].body)
+
+
+class RunWorkersCommandTests(TransactionTestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_workers_drain_queue(self):
+        for number in range(5):
+            enqueue(remember, number)
+        # общая база в памяти блокирует таблицы целиком, поэтому поток
+        # один; конкуренцию воркеров проверяют тесты claim
+        call_command('run_workers', '--once', '--concurrency', '1',
+                     stdout=StringIO())
+        self.assertEqual(sorted(CALLS), ['0', '1', '2', '3', '4'])
+        self.assertFalse(Job.objects.exists())
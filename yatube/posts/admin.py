@@ -1,22 +1,73 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.db.models import Q
 
+from core.admin import LargeTableAdminMixin
+
+from .autocomplete import prefix_range
+from .counters import reassign_group
 from .models import Group, Post
+from .search import filter_matching, fts_available, match_expression
+
+
+class ReassignGroupForm(ActionForm):
+    # slug вместо списка: <select> всех групп на миллионах строк не нужен
+    group_slug = forms.SlugField(
+        label='Slug группы', required=False,
+        help_text='Пусто — убрать посты из групп')
 
 
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     list_editable = ('group',)
+    autocomplete_fields = ('author', 'group')
+    action_form = ReassignGroupForm
+    actions = ('reassign_group',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # полнотекстовый индекс вместо LIKE '%...%' по всей таблице
+        if not fts_available() or not match_expression(search_term):
+            return super().get_search_results(request, queryset, search_term)
+        return filter_matching(queryset, search_term), False
 
-class GroupAdmin(admin.ModelAdmin):
-    list_display = ('title', 'description')
-    earch_fields = ('description',)
-    list_filter = ('title',)
+    def reassign_group(self, request, queryset):
+        slug = request.POST.get('group_slug', '').strip()
+        group = None
+        if slug:
+            group = Group.objects.filter(slug=slug).first()
+            if group is None:
+                self.message_user(request, f'Группа {slug} не найдена',
+                                  messages.ERROR)
+                return
+        moved = reassign_group(queryset, group)
+        self.message_user(request, f'Перенесено постов: {moved}')
+    reassign_group.short_description = 'Перенести в группу'
+
+
+class GroupAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('title', 'slug', 'post_count', 'description')
+    # поиск и сортировка — только по индексам title_key и slug;
+    # этот же поиск отвечает автодополнению группы в PostAdmin.
+    # pk в порядке совпадает с индексом, иначе админка добавит -pk
+    search_fields = ('title_key', 'slug')
+    ordering = ('title_key', 'pk')
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # диапазоны по индексам вместо LIKE '%...%'
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        return queryset.filter(
+            Q(**prefix_range('title_key', Group.make_title_key(term)))
+            | Q(**prefix_range('slug', term))), False
+
 
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Post, PostAdmin)
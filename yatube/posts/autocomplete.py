@@ -0,0 +1,32 @@
+from django.conf import settings
+
+from .models import Group
+
+# больше любого символа: верхняя граница диапазона строк с префиксом
+PREFIX_END = '\U0010ffff'
+
+
+def prefix_range(field, prefix):
+    return {f'{field}__gte': prefix, f'{field}__lt': prefix + PREFIX_END}
+
+
+def search_groups(query, limit=None):
+    """Группы, у которых название или slug начинаются с query.
+
+    Оба поиска — диапазоны по индексам title_key и slug с LIMIT, так
+    что стоимость не зависит от числа групп; повторы того же ввода
+    отвечает кеш запросов Group.cached. Сначала совпадения по
+    названию, затем по slug; не больше GROUP_AUTOCOMPLETE_LIMIT.
+    """
+    limit = min(limit or settings.GROUP_AUTOCOMPLETE_LIMIT,
+                settings.GROUP_AUTOCOMPLETE_LIMIT)
+    prefix = Group.make_title_key(query.strip())
+    fields = ('id', 'title', 'slug')
+    found = list(Group.cached.filter(**prefix_range('title_key', prefix))
+                 .order_by('title_key', 'pk').values(*fields)[:limit])
+    if len(found) < limit:
+        seen = {group['id'] for group in found}
+        by_slug = (Group.cached.filter(**prefix_range('slug', prefix))
+                   .order_by('slug').values(*fields)[:limit])
+        found.extend(group for group in by_slug if group['id'] not in seen)
+    return found[:limit]
@@ -0,0 +1,195 @@
+import functools
+import hashlib
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from core.cache import fetch
+
+VERSION_PREFIX = 'version:'
+FRAGMENT_PREFIX = 'fragment:'
+PAGE_PREFIX = 'page:'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def new_version():
+    # миллисекунды в начале токена служат временем изменения
+    return f'{int(time.time() * 1000)}.{uuid.uuid4().hex[:8]}'
+
+
+def version_time(version):
+    try:
+        return int(version.split('.', 1)[0]) / 1000
+    except ValueError:
+        return time.time()
+
+
+def get_versions(names):
+    """Текущие версии сущностей; отсутствующие заводятся заново.
+
+    Версия — случайный токен, а не счётчик: после вытеснения ключа
+    из кеша нельзя случайно вернуться к старой версии.
+    """
+    keys = [VERSION_PREFIX + name for name in names]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            version = new_version()
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+            found[key] = version
+    return [found[key] for key in keys]
+
+
+def bump_versions(*names):
+    cache.set_many(
+        {VERSION_PREFIX + name: new_version() for name in names}, None)
+
+
+def record(name, hit):
+    with _stats_lock:
+        _stats[(name, 'hit' if hit else 'miss')] += 1
+
+
+def fragment_cache_stats():
+    """Снимок счётчиков попаданий и промахов по именам фрагментов."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def card_keys(name, posts):
+    """Ключи карточек постов одним запросом к кешу за все версии."""
+    names = []
+    for post in posts:
+        names += [f'post:{post.pk}', f'group:{post.group_id}',
+                  f'user:{post.author_id}']
+    versions = get_versions(names)
+    keys = []
+    for number, post in enumerate(posts):
+        post_version, group_version, author_version = (
+            versions[number * 3:number * 3 + 3])
+        keys.append(
+            f'{FRAGMENT_PREFIX}{name}:{post.pk}:'
+            f'{post.pub_date.timestamp()}:'
+            f'{post_version}:{group_version}:{author_version}')
+    return keys
+
+
+def page_key(name, keys):
+    """Ключ страницы ленты: меняется вместе с любой из её карточек."""
+    digest = hashlib.md5('|'.join(keys).encode()).hexdigest()
+    return f'{FRAGMENT_PREFIX}{name}:page:{digest}'
+
+
+def post_feed_scopes(post):
+    """Ленты, в которые попадает пост, в том числе до переноса в группу."""
+    scopes = {'feed:index', f'feed:profile:{post.author_id}'}
+    for group_id in (post.group_id, getattr(post, '_loaded_group_id', None)):
+        if group_id is not None:
+            scopes.add(f'feed:group:{group_id}')
+    return scopes
+
+
+def invalidate_posts(posts):
+    names = set()
+    for post in posts:
+        names.add(f'post:{post.pk}')
+        names |= post_feed_scopes(post)
+    bump_versions(*names)
+
+
+def feed_dependencies(scope, posts):
+    """Версии, от которых зависит страница ленты, и время её изменения."""
+    names = {scope}
+    last_modified = None
+    for post in posts:
+        names |= {f'group:{post.group_id}', f'user:{post.author_id}'}
+        if last_modified is None or post.updated_at > last_modified:
+            last_modified = post.updated_at
+    return sorted(names), last_modified
+
+
+def page_cache_depends(request, names, last_modified=None):
+    """Объявляет, от каких версий зависит кешируемая страница."""
+    request.page_cache_names = list(names)
+    request.page_cache_last_modified = last_modified
+
+
+def page_validators(names, versions, last_modified=None):
+    etag = hashlib.md5('|'.join(names + versions).encode()).hexdigest()
+    timestamps = [version_time(version) for version in versions]
+    if last_modified is not None:
+        timestamps.append(last_modified.timestamp())
+    return quote_etag(etag), int(max(timestamps))
+
+
+def anonymous_page_cache(view):
+    """Кеш целых страниц для анонимных GET-запросов с ETag/Last-Modified.
+
+    View сообщает зависимости через page_cache_depends; запись
+    в кеше действительна, пока не сменилась ни одна из их версий.
+    Истёкшую или устаревшую страницу пересобирает один запрос, прочие
+    в это время получают прежнюю (core.cache.fetch).
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            return view(request, *args, **kwargs)
+        key = PAGE_PREFIX + hashlib.md5(
+            request.get_full_path().encode()).hexdigest()
+        rendered = None
+
+        def build():
+            nonlocal rendered
+            rendered = view(request, *args, **kwargs)
+            names = getattr(request, 'page_cache_names', None)
+            if rendered.status_code != 200 or names is None:
+                return None
+            versions = get_versions(names)
+            etag, last_modified = page_validators(
+                names, versions, request.page_cache_last_modified)
+            return {
+                'names': names,
+                'versions': versions,
+                'etag': etag,
+                'last_modified': last_modified,
+                'content': rendered.content,
+                'content_type': rendered['Content-Type'],
+            }
+
+        entry, hit = fetch(
+            key, build, settings.PAGE_CACHE_TIMEOUT,
+            is_fresh=lambda entry: (
+                get_versions(entry['names']) == entry['versions']))
+        record('page', hit)
+        if rendered is None:
+            return cached_response(request, entry)
+        if entry is None:
+            return rendered
+        return conditional(request, rendered, entry)
+    return wrapper
+
+
+def cached_response(request, entry):
+    response = HttpResponse(entry['content'],
+                            content_type=entry['content_type'])
+    return conditional(request, response, entry)
+
+
+def conditional(request, response, entry):
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    patch_vary_headers(response, ('Cookie',))
+    return get_conditional_response(
+        request, etag=entry['etag'],
+        last_modified=entry['last_modified'], response=response)
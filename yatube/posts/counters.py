@@ -0,0 +1,113 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from users.models import Profile
+
+from .cache import bump_versions
+from .lookups import authors, groups
+from .models import Follow, Group, Post
+
+User = get_user_model()
+
+
+def apply_post_counts(author_deltas, group_deltas):
+    """Сдвигает post_count авторов и групп атомарными F()-обновлениями."""
+    with transaction.atomic():
+        for model, lookup, deltas in (
+            (Profile, 'user_id', author_deltas),
+            (Group, 'pk', group_deltas),
+        ):
+            for pk, delta in deltas.items():
+                if pk is None or not delta:
+                    continue
+                # базовый менеджер не сдвигает версию таблицы: иначе
+                # каждый пост сбрасывал бы весь кеш Group.cached, а
+                # post_count оттуда не читается
+                queryset = model._base_manager.filter(**{lookup: pk})
+                if delta < 0:
+                    # расхождение чинит rebuild_post_counts, а не CHECK
+                    queryset = queryset.filter(post_count__gte=-delta)
+                queryset.update(post_count=F('post_count') + delta)
+    # закешированные группы и профили несут post_count
+    authors.invalidate(*author_deltas)
+    groups.invalidate(*group_deltas)
+
+
+def count_posts(posts, sign):
+    """Учитывает добавление (sign=1) или удаление (sign=-1) постов."""
+    author_deltas = Counter()
+    group_deltas = Counter()
+    for post in posts:
+        author_deltas[post.author_id] += sign
+        group_deltas[post.group_id] += sign
+    apply_post_counts(author_deltas, group_deltas)
+
+
+def move_post(old_group_id, new_group_id):
+    if old_group_id != new_group_id:
+        apply_post_counts({}, {old_group_id: -1, new_group_id: 1})
+
+
+def count_follows(author_id, delta):
+    """Сдвигает follower_count автора при подписке или отписке."""
+    queryset = Profile.objects.filter(user_id=author_id)
+    if delta < 0:
+        queryset = queryset.filter(follower_count__gte=-delta)
+    queryset.update(follower_count=F('follower_count') + delta)
+    authors.invalidate(author_id)
+
+
+def _count_subquery(field, outer_field, model=Post):
+    counts = (model.objects.filter(**{field: OuterRef(outer_field)})
+              .order_by().values(field)
+              .annotate(total=Count('pk')).values('total'))
+    return Coalesce(Subquery(counts), 0)
+
+
+def rebuild_post_counts(batch_size=500):
+    """Пересчитывает все счётчики с нуля, создавая недостающие профили."""
+    with transaction.atomic():
+        missing = (User.objects.filter(profile__isnull=True)
+                   .values_list('pk', flat=True))
+        Profile.objects.bulk_create(
+            (Profile(user_id=pk) for pk in missing.iterator()),
+            batch_size=batch_size)
+        Profile.objects.update(
+            post_count=_count_subquery('author', 'user_id'),
+            follower_count=_count_subquery('author', 'user_id', Follow))
+        Group.objects.update(post_count=_count_subquery('group', 'pk'))
+    authors.invalidate(everything=True)
+    groups.invalidate(everything=True)
+
+
+def reassign_group(queryset, group):
+    """Переносит посты в group (или убирает из групп) одним UPDATE.
+
+    Счётчики групп сдвигаются по заранее посчитанным количествам,
+    версии затронутых лент и старых групп сбрасываются.
+    """
+    group_id = group.pk if group is not None else None
+    queryset = queryset.exclude(group=group_id)
+    with transaction.atomic():
+        moved = list(queryset.order_by().values('author_id', 'group_id')
+                     .annotate(total=Count('pk')))
+        if not moved:
+            return 0
+        updated = queryset.update(group=group_id, updated_at=timezone.now())
+        group_deltas = Counter()
+        for row in moved:
+            group_deltas[row['group_id']] -= row['total']
+            group_deltas[group_id] += row['total']
+        apply_post_counts({}, group_deltas)
+    names = {'feed:index'}
+    for row in moved:
+        names |= {f'feed:profile:{row["author_id"]}',
+                  f'group:{row["group_id"]}'}
+    names |= {f'feed:group:{pk}' for pk in group_deltas if pk is not None}
+    bump_versions(*names)
+    return updated
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import Http404
+
+from core.cache import fetch
+
+from .cache import get_versions, record
+from .models import Group, Post
+
+User = get_user_model()
+
+DETAIL_PREFIX = 'post-detail:'
+
+POST_FIELDS = [field.attname for field in Post._meta.concrete_fields]
+# from_db ждёт значения в порядке полей модели
+AUTHOR_FIELDS = ['id', 'username', 'first_name', 'last_name']
+GROUP_FIELDS = ['id', 'title', 'slug']
+
+
+def detail_names(post_id, group_id, author_id):
+    # feed:profile автора сдвигается вместе с числом его постов
+    return [f'post:{post_id}', f'group:{group_id}', f'user:{author_id}',
+            f'feed:profile:{author_id}']
+
+
+def load_entry(post_id):
+    """Собирает запись кеша одним запросом или возвращает None.
+
+    Версии читаются до запроса: изменение, пришедшее между ними,
+    сдвинет версию, и следующий читатель пересоберёт запись.
+    """
+    versions = get_versions([f'post:{post_id}'])
+    row = Post.objects.filter(pk=post_id).values(
+        *POST_FIELDS,
+        *(f'author__{name}' for name in AUTHOR_FIELDS[1:]),
+        'author__profile__post_count',
+        *(f'group__{name}' for name in GROUP_FIELDS[1:]),
+    ).first()
+    if row is None:
+        return None
+    names = detail_names(post_id, row['group_id'], row['author_id'])
+    versions += get_versions(names[1:])
+    group = None
+    if row['group_id'] is not None:
+        group = [row['group_id']] + [row[f'group__{name}']
+                                     for name in GROUP_FIELDS[1:]]
+    return {
+        'names': names,
+        'versions': versions,
+        'post': [row[name] for name in POST_FIELDS],
+        'author': [row['author_id']] + [row[f'author__{name}']
+                                        for name in AUTHOR_FIELDS[1:]],
+        'group': group,
+        'post_count': row['author__profile__post_count'] or 0,
+    }
+
+
+def build_post(entry):
+    """Post с автором и группой из записи, без запросов к базе.
+
+    Остальные поля автора и группы отложены и догрузятся, только
+    если шаблон к ним обратится.
+    """
+    post = Post.from_db('default', POST_FIELDS, entry['post'])
+    post.author = User.from_db('default', AUTHOR_FIELDS, entry['author'])
+    if entry['group'] is not None:
+        post.group = Group.from_db('default', GROUP_FIELDS, entry['group'])
+    return post, entry['post_count']
+
+
+def is_fresh(entry):
+    return get_versions(entry['names']) == entry['versions']
+
+
+def get_post_detail(post_id):
+    """Пост для страницы и число постов автора, через кеш.
+
+    Запись действительна, пока не сменились версии поста, его группы,
+    автора и ленты автора. Устаревшую запись пересобирает один запрос,
+    остальные отдают её же (core.cache.fetch).
+    """
+    entry, hit = fetch(DETAIL_PREFIX + str(post_id),
+                       lambda: load_entry(post_id),
+                       settings.POST_DETAIL_CACHE_TIMEOUT,
+                       is_fresh=is_fresh)
+    record('post_detail', hit)
+    if entry is None:
+        raise Http404('Пост не найден')
+    return build_post(entry)
@@ -0,0 +1,43 @@
+import csv
+import json
+
+from django.conf import settings
+
+EXPORT_FIELDS = ('id', 'pub_date', 'author__username', 'group__slug', 'text')
+# имена колонок совпадают с форматом import_posts
+EXPORT_COLUMNS = ('id', 'pub_date', 'author', 'group', 'text')
+
+
+class Echo:
+    """Буфер для csv.writer, который сразу отдаёт записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, chunk_size=None):
+    """Кортежи колонок без создания моделей, порциями по chunk_size."""
+    return (queryset.order_by('-pub_date', '-pk')
+            .values_list(*EXPORT_FIELDS)
+            .iterator(chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE))
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for pk, pub_date, author, group, text in rows:
+        yield writer.writerow(
+            (pk, pub_date.isoformat(), author, group or '', text))
+
+
+def jsonl_lines(rows):
+    for pk, pub_date, author, group, text in rows:
+        record = dict(zip(EXPORT_COLUMNS,
+                          (pk, pub_date.isoformat(), author, group, text)))
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+FORMATS = {
+    'csv': (csv_lines, 'text/csv; charset=utf-8'),
+    'jsonl': (jsonl_lines, 'application/x-ndjson; charset=utf-8'),
+}
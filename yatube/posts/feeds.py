@@ -0,0 +1,193 @@
+import functools
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date
+from django.utils.text import Truncator
+
+from .cache import get_versions, page_validators, record
+from .models import Group, Post
+
+User = get_user_model()
+
+FEED_PREFIX = 'feed:'
+# только то, что попадает в ленту: без групп и лишних колонок автора
+ITEM_FIELDS = ('id', 'text', 'pub_date', 'updated_at', 'author__username')
+
+
+def newest_pub_date(posts):
+    # верхняя запись индекса (…, pub_date) — без сортировки всей выборки
+    return Subquery(posts.order_by('-pub_date').values('pub_date')[:1])
+
+
+def index_scope():
+    newest = (Post.objects.order_by('-pub_date')
+              .values_list('pub_date', flat=True).first())
+    return ['feed:index'], newest
+
+
+def group_scope(slug):
+    found = Group.objects.filter(slug=slug).annotate(newest=newest_pub_date(
+        Post.objects.filter(group=OuterRef('pk')))
+    ).values_list('pk', 'newest').first()
+    if found is None:
+        raise Http404('Группа не найдена')
+    # group: сдвигается при правке названия и описания канала
+    return [f'feed:group:{found[0]}', f'group:{found[0]}'], found[1]
+
+
+def author_scope(username):
+    found = User.objects.filter(username=username).annotate(
+        newest=newest_pub_date(Post.objects.filter(author=OuterRef('pk')))
+    ).values_list('pk', 'newest').first()
+    if found is None:
+        raise Http404('Автор не найден')
+    # user: сдвигается при смене имени автора
+    return [f'feed:profile:{found[0]}', f'user:{found[0]}'], found[1]
+
+
+def conditional_feed(scope):
+    """Кеш ленты с ETag/Last-Modified по версиям и дате новой записи.
+
+    Неизменившийся опрос стоит одного индексного запроса к базе:
+    scope находит сущность, имена версий ленты и самой сущности
+    и pub_date её самой свежей записи.
+    """
+    def decorator(feed_view):
+        @functools.wraps(feed_view)
+        def wrapper(request, **kwargs):
+            names, newest = scope(**kwargs)
+            # правка или удаление поста меняют версию ленты,
+            # новая запись — ещё и самую свежую pub_date
+            etag, last_modified = page_validators(
+                names + [str(newest)], get_versions(names), newest)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified)
+            if response is None:
+                key = FEED_PREFIX + hashlib.md5(
+                    f'{request.path}|{etag}'.encode()).hexdigest()
+                entry = cache.get(key)
+                record('feed', entry is not None)
+                if entry is None:
+                    rendered = feed_view(request, **kwargs)
+                    entry = {'content': rendered.content,
+                             'content_type': rendered['Content-Type']}
+                    cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+                response = HttpResponse(entry['content'],
+                                        content_type=entry['content_type'])
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+class PostsFeed(Feed):
+    description_template = None
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return (self.posts(obj).select_related('author').only(*ITEM_FIELDS)
+                .order_by('-pub_date')[:settings.FEED_SIZE])
+
+    def item_title(self, item):
+        return Truncator(item.text).words(8)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.pk})
+
+    def item_author_name(self, item):
+        return item.author.username
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+
+class LatestPostsFeed(PostsFeed):
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+
+class GroupPostsFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(
+            Group.objects.only('id', 'title', 'slug', 'description'),
+            slug=slug)
+
+    def posts(self, obj):
+        return Post.objects.filter(group=obj)
+
+    def title(self, obj):
+        return f'Yatube: записи сообщества {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', kwargs={'slug': obj.slug})
+
+
+class AuthorPostsFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(
+            User.objects.only('id', 'username', 'first_name', 'last_name'),
+            username=username)
+
+    def posts(self, obj):
+        return Post.objects.filter(author=obj)
+
+    def title(self, obj):
+        return f'Yatube: записи {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return f'Все записи пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', kwargs={'username': obj.username})
+
+
+class AtomMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+class LatestPostsAtomFeed(AtomMixin, LatestPostsFeed):
+    pass
+
+
+class GroupPostsAtomFeed(AtomMixin, GroupPostsFeed):
+    pass
+
+
+class AuthorPostsAtomFeed(AtomMixin, AuthorPostsFeed):
+    pass
+
+
+index_rss = conditional_feed(index_scope)(LatestPostsFeed())
+index_atom = conditional_feed(index_scope)(LatestPostsAtomFeed())
+group_rss = conditional_feed(group_scope)(GroupPostsFeed())
+group_atom = conditional_feed(group_scope)(GroupPostsAtomFeed())
+author_rss = conditional_feed(author_scope)(AuthorPostsFeed())
+author_atom = conditional_feed(author_scope)(AuthorPostsAtomFeed())
@@ -1,17 +1,60 @@
+from django import forms
 from django.forms import ModelForm
+from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
 
 from .models import Post
 
 
+class GroupAutocompleteSelect(forms.Select):
+    """<select> группы без полного списка групп.
+
+    В разметку попадают только пустой вариант и выбранная группа,
+    остальные скрипт подгружает из posts:group_autocomplete по мере
+    ввода. Поле остаётся ModelChoiceField: выбранный id проверяется
+    одним запросом по первичному ключу.
+    """
+
+    class Media:
+        js = ('js/group_autocomplete.js',)
+
+    def __init__(self, attrs=None):
+        attrs = {'data-autocomplete-url': reverse_lazy(
+            'posts:group_autocomplete'), **(attrs or {})}
+        super().__init__(attrs)
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [item for item in value if str(item).isdigit()]
+        groups = self.choices.queryset.filter(pk__in=selected)
+        options = [self.create_option(
+            name, '', self.choices.field.empty_label, not selected, 0)]
+        for group in groups:
+            options.append(self.create_option(
+                name, group.pk, self.choices.field.label_from_instance(group),
+                True, len(options)))
+        return [(None, options, 0)]
+
+
 class PostForm(ModelForm):
     class Meta:
         model = Post
-        fields = ('text', 'group')
+        fields = ('text', 'group', 'image')
         labels = {
             'text': _('text'),
             'group': _('group'),
+            'image': _('image'),
         }
         help_texts = {
             'group': _('Необязательно к заполнению'),
+            'image': _('Необязательно к заполнению'),
         }
+        widgets = {
+            'group': GroupAutocompleteSelect,
+        }
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        # группу уже загрузило поле формы; проверка ForeignKey в модели
+        # повторила бы тот же запрос
+        exclude.append('group')
+        return exclude
@@ -0,0 +1,62 @@
+import json
+
+from django.conf import settings
+from sorl.thumbnail import get_thumbnail
+
+from jobs.queue import enqueue, task
+
+from .cache import invalidate_posts, record
+from .models import Post
+
+
+def describe(thumbnails):
+    """Ширины без повторов: без upscale крупные варианты совпадают."""
+    found = {}
+    for thumbnail in thumbnails:
+        found.setdefault(thumbnail.width, (thumbnail.url, thumbnail.width,
+                                           thumbnail.height))
+    return [found[width] for width in sorted(found)]
+
+
+@task
+def build_thumbnails(post_id):
+    """Строит все варианты POST_THUMBNAILS для картинки поста.
+
+    Метаданные пишутся в строку поста, а не в кеш: воркер — отдельный
+    процесс, и его локальный кеш веб-процессам не виден. Запись
+    условная: если картинку успели заменить, её ждёт своя задача.
+    """
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return None
+    meta = {}
+    for variant, config in settings.POST_THUMBNAILS.items():
+        thumbnails = [get_thumbnail(post.image.name, geometry,
+                                    **config['options'])
+                      for geometry in config['geometries']]
+        if not all(thumbnail.size for thumbnail in thumbnails):
+            # sorl уже записал в лог, почему не прочитался оригинал
+            return None
+        meta[variant] = describe(thumbnails)
+    Post.objects.filter(pk=post.pk, image=post.image.name).update(
+        thumbnails=json.dumps({'image': post.image.name, 'variants': meta}))
+    # карточки и страницы с запасной картинкой больше не годятся
+    invalidate_posts([post])
+    return meta
+
+
+def thumbnail_meta(post):
+    """Метаданные миниатюр из строки поста или None, пока их нет.
+
+    Рендер не обращается ни к кешу, ни к файлам. Миниатюры прежней
+    картинки не подходят: до новой сборки страница показывает оригинал.
+    """
+    meta = json.loads(post.thumbnails) if post.thumbnails else None
+    ready = meta is not None and meta['image'] == post.image.name
+    record('thumbnails', ready)
+    return meta['variants'] if ready else None
+
+
+def schedule_thumbnails(post):
+    """Ставит построение миниатюр в очередь фоновых задач."""
+    enqueue(build_thumbnails, post.pk)
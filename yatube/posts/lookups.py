@@ -0,0 +1,161 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+
+from core.lru import BloomFilter, LRUCache
+from core.query_budget import budget_exempt
+from jobs.queue import enqueue, task
+
+from .cache import bump_versions, get_versions, record
+from .models import Group
+
+User = get_user_model()
+
+BLOOM_PREFIX = 'lookup-bloom:'
+
+
+class CachedLookup:
+    """Кеш разрешения slug/username в объект внутри процесса.
+
+    Записи сверяются с версиями в кеше Django; изменения из других
+    процессов видны, только если он общий (CACHES в settings_production),
+    а не LocMemCache процесса. Найденный объект зависит только от
+    lookup:<name>:<pk> — её сдвигает любое изменение объекта, включая
+    счётчик постов. Отсутствие зависит от lookup:<name>:new, которую
+    сдвигают только создание, смена значения поля и удаление.
+
+    Фильтр Блума по всем значениям поля отсекает неизвестные значения
+    без запроса к базе, пока построен при текущей версии new. Строит
+    его фоновая задача и кладёт в общий кеш; пока фильтра нет или он
+    устарел, отсутствие проверяет индексный запрос к базе.
+    """
+
+    def __init__(self, name, field, queryset):
+        self.name = name
+        self.field = field
+        self.queryset = queryset
+        self.entries = LRUCache(settings.LOOKUP_CACHE_SIZE)
+        self.bloom = None
+        self.bloom_version = None
+        self.bloom_checked = None
+
+    @property
+    def new_name(self):
+        return f'lookup:{self.name}:new'
+
+    @property
+    def bloom_key(self):
+        return BLOOM_PREFIX + self.name
+
+    def entry_name(self, pk):
+        return f'lookup:{self.name}:{pk}'
+
+    def get(self, value):
+        """Объект по значению поля или None, если такого нет."""
+        entry = self.entries.get(value)
+        if entry is not None:
+            names, versions, obj = entry
+            if get_versions(names) == versions:
+                record(f'lookup:{self.name}', True)
+                return obj
+        new_version, = get_versions([self.new_name])
+        if self.rejected_by_bloom(value, new_version):
+            record(f'lookup:{self.name}', True)
+            return None
+        record(f'lookup:{self.name}', False)
+        obj = self.queryset().filter(**{self.field: value}).first()
+        if obj is None:
+            self.entries.set(value, ([self.new_name], [new_version], None),
+                             settings.LOOKUP_CACHE_MISS_TIMEOUT)
+            return None
+        names = [self.entry_name(obj.pk)]
+        self.entries.set(value, (names, get_versions(names), obj),
+                         settings.LOOKUP_CACHE_TIMEOUT)
+        return obj
+
+    def get_or_404(self, value):
+        obj = self.get(value)
+        if obj is None:
+            raise Http404(f'{self.name} {value} не найден')
+        return obj
+
+    def rejected_by_bloom(self, value, new_version):
+        bloom = self.current_bloom(new_version)
+        return bloom is not None and value not in bloom
+
+    def current_bloom(self, new_version):
+        """Фильтр при версии new_version или None.
+
+        Общий кеш проверяется не чаще LOOKUP_BLOOM_CHECK_INTERVAL;
+        если фильтра там нет или он устарел, ставится задача
+        перестроить его, не чаще LOOKUP_BLOOM_REBUILD_INTERVAL.
+        """
+        if self.bloom_version == new_version:
+            return self.bloom
+        now = time.monotonic()
+        if (self.bloom_checked is not None and now - self.bloom_checked
+                < settings.LOOKUP_BLOOM_CHECK_INTERVAL):
+            return None
+        self.bloom_checked = now
+        stored = cache.get(self.bloom_key)
+        if stored is not None and stored['version'] == new_version:
+            self.bloom, self.bloom_version = stored['bloom'], new_version
+            return self.bloom
+        if cache.add(f'{self.bloom_key}:scheduled', True,
+                     settings.LOOKUP_BLOOM_REBUILD_INTERVAL):
+            # вставка задачи, а не просмотр таблицы: просмотр — в воркере
+            with budget_exempt():
+                enqueue(rebuild_bloom, self.name)
+        return None
+
+    def build_bloom(self):
+        """Строит фильтр по всем значениям поля и кладёт в общий кеш.
+
+        Версия читается до просмотра таблицы: значение, созданное
+        во время просмотра, сдвинет её, и фильтр сочтут устаревшим.
+        """
+        new_version, = get_versions([self.new_name])
+        values = self.queryset().model._default_manager.values_list(
+            self.field, flat=True)
+        bloom = BloomFilter(int(values.count() * 1.25) + 1000,
+                            settings.LOOKUP_BLOOM_ERROR_RATE)
+        for item in values.iterator(chunk_size=10000):
+            bloom.add(item)
+        cache.set(self.bloom_key, {'version': new_version, 'bloom': bloom},
+                  None)
+        return bloom
+
+    def invalidate(self, *pks, everything=False):
+        """Сбрасывает объекты pks, а с everything — ещё и все отсутствия."""
+        names = [self.entry_name(pk) for pk in pks if pk is not None]
+        if everything:
+            names.append(self.new_name)
+        if names:
+            bump_versions(*names)
+
+    def reset(self):
+        self.entries.clear()
+        self.bloom = self.bloom_version = self.bloom_checked = None
+
+
+groups = CachedLookup('group', 'slug', lambda: Group.objects.all())
+authors = CachedLookup('user', 'username',
+                       lambda: User.objects.select_related('profile'))
+LOOKUPS = {lookup.name: lookup for lookup in (groups, authors)}
+
+
+@task
+def rebuild_bloom(name):
+    """Фоновая пересборка фильтра Блума: полный просмотр таблицы."""
+    LOOKUPS[name].build_bloom()
+
+
+def get_group_or_404(slug):
+    return groups.get_or_404(slug)
+
+
+def get_author_or_404(username):
+    return authors.get_or_404(username)
@@ -0,0 +1,86 @@
+import json
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries
+
+from core.bench import percentiles
+from posts.models import Post
+
+PATHS = {
+    'models': lambda: Post.objects.select_related('author', 'group'),
+    'rows': lambda: Post.objects.feed_rows(),
+}
+
+
+def render_fields(posts):
+    """Читает у карточек то же, что шаблоны лент."""
+    for post in posts:
+        post.text, post.pub_date, post.pk
+        post.author.get_full_name(), str(post.author)
+        if post.group is not None:
+            str(post.group)
+        if post.image:
+            post.image.url
+
+
+class Command(BaseCommand):
+    help = ('Страница ленты из экземпляров моделей и из PostRow: время '
+            'выборки с чтением полей карточек и память, которую держит '
+            'страница. Нужны данные seed_bench.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--per-page', type=int, nargs='+',
+                            default=[10, 100, 500])
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        if not Post.objects.exists():
+            raise CommandError('Нет постов: сначала запустите seed_bench')
+        report = {}
+        for per_page in options['per_page']:
+            report[per_page] = {
+                name: self.measure(queryset, per_page, options['repeat'])
+                for name, queryset in PATHS.items()}
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.print_report(report)
+
+    def measure(self, queryset, per_page, repeat):
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render_fields(list(queryset()[:per_page]))
+            latencies.append(time.perf_counter() - started)
+        # память отдельным проходом: трассировка замедляет выборку
+        tracemalloc.start()
+        try:
+            page = list(queryset()[:per_page])
+            render_fields(page)
+            retained, peak = tracemalloc.get_traced_memory()
+            blocks = sum(stat.count for stat in
+                         tracemalloc.take_snapshot().statistics('filename'))
+        finally:
+            tracemalloc.stop()
+            reset_queries()
+        return {'latency_ms': percentiles(latencies),
+                'retained_kb': round(retained / 1024, 1),
+                'peak_kb': round(peak / 1024, 1),
+                'blocks': blocks,
+                'rows': len(page)}
+
+    def print_report(self, report):
+        for per_page, paths in report.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{per_page} постов на странице'))
+            for name, result in paths.items():
+                latency = result['latency_ms']
+                self.stdout.write(
+                    f'  {name:6} p50/p95/p99 {latency["p50"]}/'
+                    f'{latency["p95"]}/{latency["p99"]} мс, '
+                    f'страница держит {result["retained_kb"]} КБ '
+                    f'в {result["blocks"]} блоках, '
+                    f'пик {result["peak_kb"]} КБ')
@@ -0,0 +1,124 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.bench import percentiles
+from posts.models import Follow, Post
+from posts.timeline import TimelinePaginator, backfill
+from users.models import Profile
+
+User = get_user_model()
+
+BENCH_READER = 'bench_timeline_reader'
+BENCH_WRITER = 'bench_timeline_writer'
+# push: раскладывать всех, pull: всех подмешивать при чтении
+STRATEGIES = {'push': 10 ** 9, 'pull': 0}
+
+
+class Command(BaseCommand):
+    help = ('Лента подписок двумя стратегиями: раскладка при публикации '
+            '(push) и слияние при чтении (pull). Чтение первой и глубокой '
+            'страницы и стоимость публикации поста. Нужны данные seed_bench.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--follows', type=int, default=500,
+                            help='На скольких авторов подписан читатель')
+        parser.add_argument('--followers', type=int, default=1000,
+                            help='Сколько подписчиков у пишущего автора')
+        parser.add_argument('--depth', type=int, default=10,
+                            help='Какую по счёту страницу мерить второй')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        authors = list(User.objects.order_by('-profile__post_count')
+                       .values_list('pk', flat=True)[:options['follows']])
+        if not Post.objects.filter(author_id__in=authors).exists():
+            raise CommandError('Нет постов: сначала запустите seed_bench')
+        reader, _ = User.objects.get_or_create(username=BENCH_READER)
+        writer, _ = User.objects.get_or_create(username=BENCH_WRITER)
+        report = {}
+        try:
+            self.prepare(reader, writer, authors, options['followers'])
+            for name, limit in STRATEGIES.items():
+                with override_settings(TIMELINE_FANOUT_LIMIT=limit):
+                    report[name] = {
+                        'read': self.read(reader, options),
+                        'write': self.write(writer, options),
+                    }
+        finally:
+            # подписки, ленты и посты удаляются каскадом, счётчики
+            # подписчиков возвращают сигналы Follow
+            reader.delete()
+            writer.delete()
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.print_report(report)
+
+    def prepare(self, reader, writer, authors, followers):
+        Follow.objects.bulk_create(
+            Follow(user=reader, author_id=pk) for pk in authors)
+        followers = list(User.objects.exclude(pk__in=(reader.pk, writer.pk))
+                         .values_list('pk', flat=True)[:followers])
+        Follow.objects.bulk_create(
+            Follow(user_id=pk, author=writer) for pk in followers)
+        # bulk_create без сигналов: счётчики сдвигаем сами
+        Profile.objects.filter(user_id__in=authors).update(
+            follower_count=F('follower_count') + 1)
+        Profile.objects.filter(user=writer).update(
+            follower_count=len(followers))
+        with override_settings(TIMELINE_FANOUT_LIMIT=STRATEGIES['push']):
+            for pk in authors:
+                backfill(reader.pk, pk)
+
+    def read(self, reader, options):
+        paginator = TimelinePaginator(reader, settings.COUNT_IN_PAGES)
+        results = {}
+        for label, pages in (('first', 1), ('deep', options['depth'])):
+            latencies, queries = [], []
+            for _ in range(options['repeat']):
+                cursor = None
+                for _ in range(pages - 1):
+                    cursor = paginator.get_page(after=cursor).next_cursor
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    paginator.get_page(after=cursor)
+                    latencies.append(time.perf_counter() - started)
+                queries.append(len(captured))
+            results[label] = {'latency_ms': percentiles(latencies),
+                              'queries': statistics.mean(queries)}
+        return results
+
+    def write(self, writer, options):
+        latencies = []
+        # раскладку обычно делает воркер, здесь она мерится вместе
+        # с публикацией
+        with override_settings(JOBS_EAGER=True):
+            for number in range(options['repeat']):
+                started = time.perf_counter()
+                Post.objects.create(author=writer, text=f'Пост {number}')
+                latencies.append(time.perf_counter() - started)
+        return {'latency_ms': percentiles(latencies)}
+
+    def print_report(self, report):
+        for name, result in report.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for label, read in result['read'].items():
+                latency = read['latency_ms']
+                self.stdout.write(
+                    f'  чтение {label:5} p50/p95/p99 {latency["p50"]}/'
+                    f'{latency["p95"]}/{latency["p99"]} мс, '
+                    f'{read["queries"]:.0f} запросов')
+            latency = result['write']['latency_ms']
+            self.stdout.write(
+                f'  публикация p50/p95/p99 {latency["p50"]}/'
+                f'{latency["p95"]}/{latency["p99"]} мс')
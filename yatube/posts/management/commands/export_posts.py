@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import FORMATS, export_rows
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Потоковая выгрузка постов группы или автора в CSV или JSONL.'
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group()
+        scope.add_argument('--group', help='slug группы')
+        scope.add_argument('--author', help='username автора')
+        parser.add_argument('--format', choices=sorted(FORMATS),
+                            default='jsonl')
+        parser.add_argument('--output', default='-',
+                            help="Файл или '-' для stdout")
+        parser.add_argument('--chunk-size', type=int)
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.all()
+        if options['group']:
+            try:
+                group = Group.objects.get(slug=options['group'])
+            except Group.DoesNotExist:
+                raise CommandError(f'Нет группы {options["group"]}')
+            queryset = group.posts.all()
+        elif options['author']:
+            try:
+                author = User.objects.get(username=options['author'])
+            except User.DoesNotExist:
+                raise CommandError(f'Нет автора {options["author"]}')
+            queryset = author.posts.all()
+        lines, _ = FORMATS[options['format']]
+        rows = export_rows(queryset, options['chunk_size'])
+        if options['output'] == '-':
+            for line in lines(rows):
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as stream:
+            stream.writelines(lines(rows))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import rebuild_post_counts
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает post_count профилей авторов и групп.'
+
+    def handle(self, *args, **options):
+        rebuild_post_counts()
+        self.stdout.write(self.style.SUCCESS('Счётчики постов пересчитаны'))
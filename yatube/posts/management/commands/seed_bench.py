@@ -0,0 +1,148 @@
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from posts.cache import bump_versions
+from posts.counters import rebuild_post_counts
+from posts.models import Group, Post
+from posts.querycache import bump_tables
+from posts.search import search_triggers_paused
+from users.models import Profile
+
+User = get_user_model()
+
+WORDS = (
+    'кот пёс дом город река лес утро вечер книга музыка поезд дорога '
+    'работа отпуск море солнце дождь снег друг семья код сервер база '
+    'запрос индекс страница лента группа автор пост текст новость '
+    'погода весна лето осень зима чай кофе завтра вчера сегодня'
+).split()
+
+# Django на SQLite собирает многострочный INSERT через UNION ALL,
+# а SQLite не принимает больше 500 частей в одном составном SELECT
+BULK_BATCH_SIZE = 500
+
+
+def zipf_weights(size, exponent):
+    """Накопленные веса Zipf: k-й элемент в k^s раз реже первого."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)))
+
+
+class Command(BaseCommand):
+    help = ('Быстро заполняет базу синтетическими постами для бенчмарков: '
+            'сырые пачечные INSERT, авторы и группы по закону Zipf.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--zipf', type=float, default=1.1,
+                            help='Показатель распределения Zipf')
+        parser.add_argument('--no-group', type=float, default=0.3,
+                            help='Доля постов без группы')
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней распределить даты')
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['posts'] < 0 or options['users'] < 1:
+            raise CommandError('Нужен хотя бы один автор')
+        self.random = random.Random(options['seed'])
+        started = time.monotonic()
+        authors = self.seed_users(options['users'])
+        groups = self.seed_groups(options['groups'])
+        with search_triggers_paused():
+            self.seed_posts(authors, groups, options)
+        rebuild_post_counts()
+        bump_versions('feed:index',
+                      *(f'feed:profile:{pk}' for pk in authors),
+                      *(f'feed:group:{pk}' for pk in groups))
+        # сырые INSERT мимо ORM: кеш Post.cached сбрасываем сами
+        bump_tables(Post._meta.db_table)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {options["posts"]} постов за {elapsed:.1f} с'))
+
+    def seed_users(self, count):
+        usernames = [f'bench_user_{number}' for number in range(count)]
+        existing = set(User.objects.filter(
+            username__in=usernames).values_list('username', flat=True))
+        # одинаковый хеш для всех: make_password на каждого слишком дорог
+        password = make_password(None)
+        User.objects.bulk_create(
+            (User(username=name, password=password)
+             for name in usernames if name not in existing),
+            batch_size=BULK_BATCH_SIZE)
+        authors = dict(User.objects.filter(
+            username__in=usernames).values_list('username', 'pk'))
+        Profile.objects.bulk_create(
+            (Profile(user_id=pk) for pk in User.objects.filter(
+                pk__in=authors.values(), profile__isnull=True
+            ).values_list('pk', flat=True)),
+            batch_size=BULK_BATCH_SIZE)
+        # порядок имён — ранг в распределении Zipf
+        return [authors[name] for name in usernames]
+
+    def seed_groups(self, count):
+        slugs = [f'bench-group-{number}' for number in range(count)]
+        existing = set(Group.objects.filter(
+            slug__in=slugs).values_list('slug', flat=True))
+        Group.objects.bulk_create(
+            (Group(slug=slug, title=f'Группа {number}',
+                   description=f'Синтетическая группа {number}')
+             for number, slug in enumerate(slugs) if slug not in existing),
+            batch_size=BULK_BATCH_SIZE)
+        groups = dict(Group.objects.filter(
+            slug__in=slugs).values_list('slug', 'pk'))
+        return [groups[slug] for slug in slugs]
+
+    def seed_posts(self, authors, groups, options):
+        total = options['posts']
+        batch_size = options['batch_size']
+        author_weights = zipf_weights(len(authors), options['zipf'])
+        group_weights = zipf_weights(len(groups), options['zipf'])
+        quote = connection.ops.quote_name
+        fields = [Post._meta.get_field(name) for name in
+                  ('text', 'pub_date', 'updated_at', 'author', 'group',
+                   'image', 'thumbnails')]
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(Post._meta.db_table),
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)))
+        start = timezone.now() - timedelta(days=options['days'])
+        step = options['days'] * 86400 / max(total, 1)
+        adapt = connection.ops.adapt_datetimefield_value
+        done = 0
+        while done < total:
+            size = min(batch_size, total - done)
+            batch_authors = self.random.choices(
+                authors, cum_weights=author_weights, k=size)
+            batch_groups = (self.random.choices(
+                groups, cum_weights=group_weights, k=size)
+                if groups else [None] * size)
+            rows = []
+            for number in range(size):
+                pub_date = adapt(start + timedelta(
+                    seconds=(done + number) * step))
+                group = batch_groups[number]
+                if self.random.random() < options['no_group']:
+                    group = None
+                rows.append((self.text(), pub_date, pub_date,
+                             batch_authors[number], group, '', ''))
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, rows)
+            done += size
+            self.stdout.write(f'{done}/{total}')
+
+    def text(self):
+        return ' '.join(self.random.choices(
+            WORDS, k=self.random.randint(5, 40))).capitalize()
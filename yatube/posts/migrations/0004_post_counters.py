@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:24
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_post_counts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    Profile = apps.get_model('users', 'Profile')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    def count_subquery(field, outer_field):
+        counts = (Post.objects.filter(**{field: OuterRef(outer_field)})
+                  .order_by().values(field)
+                  .annotate(total=Count('pk')).values('total'))
+        return Coalesce(Subquery(counts), 0)
+
+    Profile.objects.bulk_create(
+        Profile(user_id=pk) for pk in User.objects.values_list('pk', flat=True)
+    )
+    Profile.objects.update(post_count=count_subquery('author', 'user_id'))
+    Group.objects.update(post_count=count_subquery('group', 'pk'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_post_feed_indexes'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество постов'),
+        ),
+        migrations.RunPython(fill_post_counts, migrations.RunPython.noop),
+    ]
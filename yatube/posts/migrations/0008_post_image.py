@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:57
+
+from django.db import migrations, models
+
+from posts.search import create_search_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_follow_timeline'),
+    ]
+
+    operations = [
+        # при откате триггеры пропадут вместе с удалёнными полями
+        migrations.RunPython(migrations.RunPython.noop,
+                             create_search_triggers),
+        migrations.AddField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, height_field='image_height', upload_to='posts/', verbose_name='Картинка', width_field='image_width'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        # SQLite пересоздал posts_post, а триггеры удалил
+        migrations.RunPython(create_search_triggers,
+                             migrations.RunPython.noop),
+    ]
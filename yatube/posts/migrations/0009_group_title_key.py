@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:07
+
+from django.db import migrations, models
+
+
+def fill_title_keys(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    groups = list(Group.objects.only('title'))
+    for group in groups:
+        group.title_key = group.title.casefold()[:200]
+    Group.objects.bulk_update(groups, ['title_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_post_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='title_key',
+            field=models.CharField(default='', editable=False, max_length=200),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['title_key'], name='group_title_key_idx'),
+        ),
+        migrations.RunPython(fill_title_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:31
+
+from django.db import migrations, models
+
+from posts.search import create_search_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_group_title_key'),
+    ]
+
+    operations = [
+        # при откате триггеры пропадут вместе с удалённым полем
+        migrations.RunPython(migrations.RunPython.noop,
+                             create_search_triggers),
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        # SQLite пересоздал posts_post, а триггеры удалил
+        migrations.RunPython(create_search_triggers,
+                             migrations.RunPython.noop),
+    ]
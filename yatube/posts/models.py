@@ -1,17 +1,137 @@
+import datetime
+
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
+
+from .querycache import CachedManager, CachedQuerySet, VersionedQuerySet
 
 User = get_user_model()
 
 
+class GroupQuerySet(VersionedQuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # save() не вызывается, ключ названия заполняем здесь
+        objs = list(objs)
+        for group in objs:
+            group.title_key = Group.make_title_key(group.title)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class CachedGroupQuerySet(CachedQuerySet, GroupQuerySet):
+    pass
+
+
+class CachedGroupManager(CachedManager.from_queryset(CachedGroupQuerySet)):
+    def get_queryset(self):
+        # счётчик сдвигается без версии таблицы (posts.counters),
+        # поэтому из кеша его не берём: догрузится из базы
+        return super().get_queryset().defer('post_count')
+
+
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True)
     description = models.TextField()
+    # денормализованный счётчик, поддерживается сигналами posts
+    post_count = models.PositiveIntegerField('Количество постов',
+                                             default=0,
+                                             editable=False)
+    # название без регистра: поиск по префиксу идёт диапазоном по индексу,
+    # LIKE в SQLite индекс не использует и кириллицу не сворачивает
+    title_key = models.CharField(max_length=200, editable=False,
+                                 default='')
+
+    objects = GroupQuerySet.as_manager()
+    cached = CachedGroupManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['title_key'], name='group_title_key_idx'),
+        ]
 
     def __str__(self):
         return self.slug
 
+    @staticmethod
+    def make_title_key(title):
+        return title.casefold()[:200]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # slug на момент загрузки: по нему видно переименование
+        instance._loaded_slug = instance.__dict__.get('slug')
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.title_key = self.make_title_key(self.title)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'title' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'title_key'}
+        super().save(*args, **kwargs)
+
+
+class PostQuerySet(VersionedQuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create не шлёт post_save, поэтому счётчики и версии
+        # кеша обновляем здесь одним UPDATE на автора и группу
+        from .cache import invalidate_posts
+        from .counters import count_posts
+        objs = super().bulk_create(objs, *args, **kwargs)
+        count_posts(objs, 1)
+        invalidate_posts(objs)
+        return objs
+
+    def feed_rows(self):
+        """Карточки лент как PostRow: только нужные столбцы одним JOIN.
+
+        Без экземпляров Post, User и Group на каждую строку; шаблоны
+        лент работают с PostRow так же, как с моделью.
+        """
+        from .rows import FEED_COLUMNS, PostRowIterable
+        queryset = self.values_list(*FEED_COLUMNS)
+        queryset._iterable_class = PostRowIterable
+        return queryset
+
+    def dates(self, field_name, kind, order='ASC'):
+        """Годы и месяцы pub_date скачками по индексу вместо DISTINCT.
+
+        DISTINCT по усечённой дате читает весь индекс; здесь на каждый
+        год или месяц — один поиск первой записи не раньше его начала.
+        Так date_hierarchy в админке не зависит от размера таблицы.
+        """
+        if field_name != 'pub_date' or kind not in ('year', 'month'):
+            return super().dates(field_name, kind, order)
+        found = []
+        queryset = self.order_by('pub_date').values_list(
+            'pub_date', flat=True)
+        boundary = None
+        while True:
+            scoped = queryset
+            if boundary is not None:
+                scoped = scoped.filter(pub_date__gte=boundary)
+            first = scoped.first()
+            if first is None:
+                break
+            if timezone.is_aware(first):
+                first = timezone.localtime(first)
+            if kind == 'year':
+                start = datetime.date(first.year, 1, 1)
+                following = datetime.datetime(first.year + 1, 1, 1)
+            else:
+                start = datetime.date(first.year, first.month, 1)
+                following = datetime.datetime(
+                    first.year + first.month // 12, first.month % 12 + 1, 1)
+            found.append(start)
+            boundary = (timezone.make_aware(following)
+                        if timezone.is_aware(first) else following)
+        return found if order == 'ASC' else found[::-1]
+
+
+class CachedPostQuerySet(CachedQuerySet, PostQuerySet):
+    pass
+
 
 class Post(models.Model):
     text = models.TextField(
@@ -19,6 +139,7 @@ class Post(models.Model):
         help_text='Введите текст')
     pub_date = models.DateTimeField('Дата публикации',
                                     auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name='posts',
                                verbose_name='Автор')
@@ -30,11 +151,98 @@ class Post(models.Model):
                               verbose_name='Группа',
                               help_text='Выберите группу'
                               )
+    # размеры оригинала хранятся в строке: страницы не открывают файл
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True,
+                              width_field='image_width',
+                              height_field='image_height')
+    image_width = models.PositiveIntegerField(null=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, editable=False)
+    # миниатюры пишет воркер; строку читают все процессы, в отличие
+    # от кеша воркера
+    thumbnails = models.TextField(blank=True, default='', editable=False)
+
+    objects = PostQuerySet.as_manager()
+    cached = CachedManager.from_queryset(CachedPostQuerySet)()
 
     class Meta:
         ordering = ['-pub_date']
+        # индексы под ленты: общая, группы и автора, все по дате
+        indexes = [
+            models.Index(fields=['pub_date'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['group', 'pub_date'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', 'pub_date'],
+                         name='post_author_pub_date_idx'),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
     def __str__(self):
         return self.text[:15]
+
+    def save(self, *args, **kwargs):
+        # thumbnails пишет воркер: правка поста, загруженного до того,
+        # не должна затирать их прежним значением
+        if (not self._state.adding and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'thumbnails']
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # группа на момент загрузки: по ней видно перенос поста
+        instance._loaded_group_id = instance.__dict__.get('group_id')
+        # картинка на момент загрузки: по ней видно замену файла
+        instance._loaded_image = instance.__dict__.get('image')
+        return instance
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='follower',
+                             verbose_name='Подписчик')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='following',
+                               verbose_name='Автор')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+            models.CheckConstraint(check=~models.Q(user=models.F('author')),
+                                   name='no_self_follow'),
+        ]
+        verbose_name = 'Подписка'
+        verbose_name_plural = 'Подписки'
+
+    def __str__(self):
+        return f'{self.user} → {self.author}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в ленте подписок читателя, разложенный при публикации.
+
+    author и pub_date скопированы из поста: по ним лента листается
+    по индексу без JOIN, а отписка удаляет записи одним DELETE.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='timeline', db_index=False)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='+')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='+', db_index=False)
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'pub_date', 'post'],
+                         name='timeline_user_pub_date_idx'),
+        ]
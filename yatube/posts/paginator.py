@@ -0,0 +1,143 @@
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def pack_cursor(*values):
+    raw = '|'.join(str(value) for value in values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def unpack_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        return base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursor(token)
+
+
+def encode_cursor(pub_date, pk):
+    return pack_cursor(pub_date.isoformat(), pk)
+
+
+def decode_cursor(token):
+    """Возвращает пару (pub_date, pk), зашитую в непрозрачный токен."""
+    try:
+        pub_date, pk = unpack_cursor(token)
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except ValueError:
+        raise InvalidCursor(token)
+    if pub_date is None:
+        raise InvalidCursor(token)
+    return pub_date, pk
+
+
+class CursorPage:
+    """Страница ленты без номера и без общего количества записей."""
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.cursor_for(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.cursor_for(self.object_list[0])
+
+
+class CursorPaginator:
+    """Keyset-пагинация по (pub_date, id) от новых записей к старым.
+
+    Каждая страница — один запрос с LIMIT per_page + 1 по индексу,
+    без COUNT(*) и OFFSET, поэтому глубина листания на стоимость не влияет.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    @staticmethod
+    def cursor_for(obj):
+        return encode_cursor(obj.pub_date, obj.pk)
+
+    def slice(self, queryset, after=None, before=None, key='pk'):
+        """Возвращает до per_page + 1 записей после/до курсора.
+
+        Для before записи возвращаются в обратном (возрастающем) порядке.
+        key — поле, которое вместе с pub_date упорядочивает записи.
+        """
+        if before is not None:
+            pub_date, pk = before
+            queryset = queryset.filter(
+                Q(pub_date__gt=pub_date)
+                | Q(pub_date=pub_date, **{f'{key}__gt': pk})
+            ).order_by('pub_date', key)
+        else:
+            if after is not None:
+                pub_date, pk = after
+                queryset = queryset.filter(
+                    Q(pub_date__lt=pub_date)
+                    | Q(pub_date=pub_date, **{f'{key}__lt': pk})
+                )
+            queryset = queryset.order_by('-pub_date', f'-{key}')
+        return list(queryset[:self.per_page + 1])
+
+    def get_page(self, after=None, before=None):
+        """Как Paginator.get_page: битый курсор даёт первую страницу."""
+        try:
+            after = decode_cursor(after) if after else None
+            before = decode_cursor(before) if before else None
+        except InvalidCursor:
+            after = before = None
+        rows = self.slice(self.object_list, after=after, before=before)
+        if before is not None and not rows:
+            # курсор новее всех записей или его посты удалены
+            before = None
+            rows = self.slice(self.object_list)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if before is not None:
+            rows.reverse()
+            return CursorPage(rows, self, has_next=True,
+                              has_previous=has_more)
+        return CursorPage(rows, self, has_next=has_more,
+                          has_previous=after is not None)
@@ -0,0 +1,139 @@
+import hashlib
+import re
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import models, transaction
+
+from .cache import bump_versions, get_versions
+
+TABLE_PREFIX = 'table:'
+QUERY_PREFIX = 'query:'
+
+# таблицы, у которых все записи через ORM сдвигают версию
+TRACKED_TABLES = set()
+TABLES_IN_SQL = re.compile(r'(?:FROM|JOIN)\s+"(\w+)"')
+
+_state = threading.local()
+
+
+def dirty_tables():
+    """Таблицы, изменённые в незавершённой транзакции этого потока."""
+    if not hasattr(_state, 'dirty'):
+        _state.dirty = set()
+    if not transaction.get_connection().in_atomic_block:
+        # транзакция закоммичена или откачена
+        _state.dirty.clear()
+    return _state.dirty
+
+
+def bump_tables(*tables):
+    """Сдвигает версии таблиц после записи.
+
+    Внутри транзакции версия сдвигается при коммите: раньше другие
+    соединения ещё видят старые строки и закешировали бы их под новой
+    версией. До коммита этот поток читает такие таблицы мимо кеша —
+    иначе незакоммиченные строки пережили бы откат.
+    """
+    names = [TABLE_PREFIX + table for table in tables]
+    if transaction.get_connection().in_atomic_block:
+        dirty_tables().update(tables)
+        transaction.on_commit(lambda: bump_versions(*names))
+    else:
+        bump_versions(*names)
+
+
+class VersionedQuerySet(models.QuerySet):
+    """QuerySet, чьи массовые записи сдвигают версию таблицы модели.
+
+    save() и delete() отдельных объектов учитывают сигналы posts.
+    """
+
+    def _bump(self):
+        bump_tables(self.model._meta.db_table)
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        self._bump()
+        return rows
+    update.alters_data = True
+
+    def delete(self):
+        deleted = super().delete()
+        self._bump()
+        return deleted
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self._bump()
+        return objs
+
+
+class CachedQuerySet(VersionedQuerySet):
+    """Результаты запросов в кеше Django под ключом из SQL и параметров.
+
+    В ключ входят версии всех таблиц запроса, поэтому любая запись
+    через ORM делает прежние результаты недостижимыми. Запросы
+    к таблицам без версий (например, select_related автора) и больше
+    QUERY_CACHE_MAX_ROWS строк идут в базу как обычно.
+    """
+
+    def _cache_key(self, kind):
+        if self._prefetch_related_lookups:
+            return None
+        try:
+            sql, params = self.query.clone().sql_with_params()
+        except EmptyResultSet:
+            return None
+        tables = set(TABLES_IN_SQL.findall(sql))
+        if (not tables or not tables <= TRACKED_TABLES
+                or tables & dirty_tables()):
+            return None
+        versions = get_versions(
+            sorted(TABLE_PREFIX + table for table in tables))
+        digest = hashlib.md5(repr((
+            self.db, kind, self._iterable_class.__name__, self._fields,
+            sql, params, versions)).encode()).hexdigest()
+        return QUERY_PREFIX + digest
+
+    def _cached(self, kind, compute):
+        key = self._cache_key(kind)
+        if key is None:
+            return compute()
+        result = cache.get(key)
+        if result is None:
+            result = compute()
+            if kind != 'rows' or len(result) <= settings.QUERY_CACHE_MAX_ROWS:
+                cache.set(key, result, settings.QUERY_CACHE_TIMEOUT)
+        return result
+
+    def _fetch_all(self):
+        if self._result_cache is None:
+            def compute():
+                super(CachedQuerySet, self)._fetch_all()
+                return self._result_cache
+            self._result_cache = self._cached('rows', compute)
+        super()._fetch_all()
+
+    def count(self):
+        if self._result_cache is not None:
+            return len(self._result_cache)
+        return self._cached('count', super().count)
+
+    def exists(self):
+        if self._result_cache is not None:
+            return bool(self._result_cache)
+        return self._cached('exists', super().exists)
+
+
+class CachedManager(models.Manager):
+    """Opt-in кеш запросов: Model.cached.filter(...)."""
+
+    def contribute_to_class(self, model, name):
+        super().contribute_to_class(model, name)
+        if not model._meta.abstract:
+            TRACKED_TABLES.add(model._meta.db_table)
@@ -0,0 +1,130 @@
+from django.db.models.query import ValuesListIterable
+
+from .models import Post
+
+POST_COLUMNS = ('pk', 'text', 'pub_date', 'updated_at', 'author_id',
+                'group_id', 'image', 'image_width', 'image_height',
+                'thumbnails')
+AUTHOR_COLUMNS = ('author__username', 'author__first_name',
+                  'author__last_name')
+GROUP_COLUMNS = ('group__slug', 'group__title')
+FEED_COLUMNS = POST_COLUMNS + AUTHOR_COLUMNS + GROUP_COLUMNS
+
+
+class AuthorRow:
+    """Автор карточки: то, что шаблоны лент читают у User."""
+    __slots__ = ('pk', 'username', 'first_name', 'last_name')
+
+    def __init__(self, pk, username, first_name, last_name):
+        self.pk = pk
+        self.username = username
+        self.first_name = first_name
+        self.last_name = last_name
+
+    @property
+    def id(self):
+        return self.pk
+
+    def get_full_name(self):
+        return f'{self.first_name} {self.last_name}'.strip()
+
+    def __str__(self):
+        return self.username
+
+
+class GroupRow:
+    """Группа карточки; str() — slug, как у Group."""
+    __slots__ = ('pk', 'slug', 'title')
+
+    def __init__(self, pk, slug, title):
+        self.pk = pk
+        self.slug = slug
+        self.title = title
+
+    @property
+    def id(self):
+        return self.pk
+
+    def __str__(self):
+        return self.slug
+
+
+class ImageRow:
+    """Имя файла картинки с url, как у FieldFile, без обращений к диску."""
+    __slots__ = ('name',)
+
+    storage = Post._meta.get_field('image').storage
+
+    def __init__(self, name):
+        self.name = name
+
+    def __bool__(self):
+        return bool(self.name)
+
+    @property
+    def url(self):
+        return self.storage.url(self.name)
+
+    def __str__(self):
+        return self.name or ''
+
+
+class PostRow:
+    """Пост для карточки ленты вместо экземпляра Post.
+
+    Атрибуты те же, что читают шаблоны лент, теги post_image
+    и card_cache; card_cache_key и cached_card заполняет feed_cache.
+    """
+    __slots__ = POST_COLUMNS + ('author', 'group', 'card_cache_key',
+                                'cached_card')
+
+    def __init__(self, values, author, group):
+        (self.pk, self.text, self.pub_date, self.updated_at, self.author_id,
+         self.group_id, image, self.image_width, self.image_height,
+         self.thumbnails) = values
+        self.image = ImageRow(image)
+        self.author = author
+        self.group = group
+
+    @property
+    def id(self):
+        return self.pk
+
+    def __eq__(self, other):
+        return isinstance(other, PostRow) and self.pk == other.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return self.text[:15]
+
+    def __repr__(self):
+        return f'<PostRow: {self.pk}>'
+
+
+class PostRowIterable(ValuesListIterable):
+    """Строки values_list(*FEED_COLUMNS), собранные в PostRow.
+
+    Автор и группа, встреченные на странице повторно, — один и тот же
+    объект: в ленте группы GroupRow создаётся один раз.
+    """
+
+    def __iter__(self):
+        authors = {}
+        groups = {}
+        posts = len(POST_COLUMNS)
+        names = posts + len(AUTHOR_COLUMNS)
+        for row in super().__iter__():
+            author_id, group_id = row[4], row[5]
+            author = authors.get(author_id)
+            if author is None:
+                author = authors[author_id] = AuthorRow(
+                    author_id, *row[posts:names])
+            group = None
+            if group_id is not None:
+                group = groups.get(group_id)
+                if group is None:
+                    group = groups[group_id] = GroupRow(
+                        group_id, *row[names:])
+            yield PostRow(row[:posts], author, group)
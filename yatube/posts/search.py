@@ -0,0 +1,170 @@
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+
+from .models import Post
+from .paginator import CursorPage, InvalidCursor, pack_cursor, unpack_cursor
+
+FTS_TABLE = 'posts_post_fts'
+
+CREATE_FTS_SQL = f'''
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    text, content='posts_post', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)'''
+
+# Пересоздание posts_post в миграциях SQLite удаляет триггеры,
+# поэтому такие миграции снова вызывают create_search_triggers.
+TRIGGERS_SQL = (
+    f'''CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS posts_post_fts_update
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END''',
+)
+
+SEARCH_SQL = f'''
+SELECT posts_post.id, bm25({FTS_TABLE}) AS score
+FROM {FTS_TABLE} JOIN posts_post ON posts_post.id = {FTS_TABLE}.rowid
+WHERE {FTS_TABLE} MATCH %s {{filters}}
+ORDER BY score, posts_post.id
+LIMIT %s'''
+
+
+def fts_available(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def create_search_index(apps, schema_editor):
+    if not fts_available(schema_editor.connection):
+        return
+    schema_editor.execute(CREATE_FTS_SQL)
+    create_search_triggers(apps, schema_editor)
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def create_search_triggers(apps, schema_editor):
+    if not fts_available(schema_editor.connection):
+        return
+    for sql in TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if not fts_available(schema_editor.connection):
+        return
+    for trigger in ('insert', 'delete', 'update'):
+        schema_editor.execute(
+            f'DROP TRIGGER IF EXISTS posts_post_fts_{trigger}')
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+@contextmanager
+def search_triggers_paused():
+    """Массовая вставка без триггеров, затем одна пересборка индекса.
+
+    Построчные триггеры на миллионах строк медленнее, чем 'rebuild'.
+    """
+    if not fts_available():
+        yield
+        return
+    with connection.cursor() as cursor:
+        for trigger in ('insert', 'delete', 'update'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS posts_post_fts_{trigger}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for sql in TRIGGERS_SQL:
+                cursor.execute(sql)
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def match_expression(query):
+    """Запрос пользователя как набор слов FTS5, без операторов и кавычек."""
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', query))
+
+
+def search_ids(query):
+    """SQL подзапроса с id постов, где встречаются все слова запроса."""
+    return (f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [match_expression(query)])
+
+
+def filter_matching(queryset, query):
+    """Оставляет в queryset посты, найденные полнотекстовым индексом.
+
+    pk__in=RawSQL(...) не годится: подзапрос попадает в IN ((...)),
+    и SQLite сравнивает id только с первой найденной строкой.
+    """
+    sql, params = search_ids(query)
+    return queryset.extra(where=[f'posts_post.id IN ({sql})'],
+                          params=params)
+
+
+class SearchPaginator:
+    """Курсорная выдача поиска, упорядоченная по bm25 и id."""
+    is_cursor = True
+
+    def __init__(self, query, per_page, group_id=None, author_id=None):
+        self.match = match_expression(query)
+        self.per_page = int(per_page)
+        self.group_id = group_id
+        self.author_id = author_id
+
+    @staticmethod
+    def cursor_for(post):
+        return pack_cursor(repr(post.search_score), post.pk)
+
+    def ranked_ids(self, after=None):
+        filters = []
+        params = [self.match]
+        if self.group_id is not None:
+            filters.append('AND posts_post.group_id = %s')
+            params.append(self.group_id)
+        if self.author_id is not None:
+            filters.append('AND posts_post.author_id = %s')
+            params.append(self.author_id)
+        if after is not None:
+            score, pk = after
+            filters.append(
+                'AND (score > %s OR (score = %s AND posts_post.id > %s))')
+            params += [score, score, pk]
+        params.append(self.per_page + 1)
+        with connection.cursor() as cursor:
+            cursor.execute(SEARCH_SQL.format(filters=' '.join(filters)),
+                           params)
+            return cursor.fetchall()
+
+    def get_page(self, after=None):
+        if not self.match:
+            return CursorPage([], self, has_next=False, has_previous=False)
+        try:
+            score, pk = unpack_cursor(after) if after else (None, None)
+            after = (float(score), int(pk)) if after else None
+        except (InvalidCursor, ValueError):
+            after = None
+        ranked = self.ranked_ids(after)
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            [pk for pk, score in ranked[:self.per_page]])
+        rows = []
+        for pk, score in ranked[:self.per_page]:
+            if pk in posts:
+                posts[pk].search_score = score
+                rows.append(posts[pk])
+        return CursorPage(rows, self,
+                          has_next=len(ranked) > self.per_page,
+                          has_previous=after is not None)
@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from jobs.queue import enqueue
+
+from .cache import bump_versions, invalidate_posts
+from .counters import count_follows, count_posts, move_post
+from .images import schedule_thumbnails
+from .lookups import authors, groups
+from .models import Follow, Group, Post
+from .querycache import bump_tables
+from .timeline import backfill, drop_author, fan_out_post
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_posts([instance])
+    if created:
+        count_posts([instance], 1)
+        # раскладка растёт с числом подписчиков — её делает воркер
+        enqueue(fan_out_post, instance.pk)
+    elif hasattr(instance, '_loaded_group_id'):
+        move_post(instance._loaded_group_id, instance.group_id)
+    instance._loaded_group_id = instance.group_id
+    if instance.image and instance.image.name != getattr(
+            instance, '_loaded_image', None):
+        schedule_thumbnails(instance)
+    instance._loaded_image = instance.image.name
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    invalidate_posts([instance])
+    count_posts([instance], -1)
+
+
+def lookup_value_changed(instance, field, created):
+    """Создан ли объект или сменилось ли поле, по которому его ищут.
+
+    Только это сбрасывает закешированные отсутствия и фильтр Блума;
+    прочие правки касаются одного объекта.
+    """
+    loaded = f'_loaded_{field}'
+    changed = created or getattr(instance, loaded, None) != getattr(
+        instance, field)
+    setattr(instance, loaded, getattr(instance, field))
+    return changed
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_fragments(sender, instance, created, **kwargs):
+    bump_versions(f'group:{instance.pk}')
+    groups.invalidate(instance.pk, everything=lookup_value_changed(
+        instance, 'slug', created))
+
+
+@receiver(post_delete, sender=Group)
+def invalidate_deleted_group(sender, instance, **kwargs):
+    bump_versions(f'group:{instance.pk}')
+    groups.invalidate(instance.pk, everything=True)
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    # отложенное поле не загружаем: тогда сохранение считается сменой
+    instance._loaded_username = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_fragments(sender, instance, created,
+                                update_fields=None, **kwargs):
+    # вход обновляет только last_login, карточки от него не зависят
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    bump_versions(f'user:{instance.pk}')
+    authors.invalidate(instance.pk, everything=lookup_value_changed(
+        instance, 'username', created))
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_author(sender, instance, **kwargs):
+    bump_versions(f'user:{instance.pk}')
+    authors.invalidate(instance.pk, everything=True)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+def bump_table_version(sender, **kwargs):
+    bump_tables(sender._meta.db_table)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    # SET_NULL обновляет посты группы без сигналов
+    bump_tables(Group._meta.db_table, Post._meta.db_table)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        count_follows(instance.author_id, 1)
+        backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    count_follows(instance.author_id, -1)
+    drop_author(instance.user_id, instance.author_id)
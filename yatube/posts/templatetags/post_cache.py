@@ -0,0 +1,76 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+
+from ..cache import card_keys, page_key, record
+
+register = template.Library()
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist, name, page):
+        self.nodelist = nodelist
+        self.name = name
+        self.page = page
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        posts = list(self.page.resolve(context))
+        keys = card_keys(name, posts)
+        key = page_key(name, keys)
+        html = cache.get(key)
+        record(f'{name}:page', html is not None)
+        if html is not None:
+            return html
+        cards = cache.get_many(keys)
+        for post, card_key in zip(posts, keys):
+            post.card_cache_key = card_key
+            post.cached_card = cards.get(card_key)
+        html = self.nodelist.render(context)
+        cache.set(key, html, settings.FRAGMENT_CACHE_TIMEOUT)
+        return html
+
+
+class CardCacheNode(template.Node):
+    def __init__(self, nodelist, name, post):
+        self.nodelist = nodelist
+        self.name = name
+        self.post = post
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        post = self.post.resolve(context)
+        key = getattr(post, 'card_cache_key', None)
+        if key is None:
+            key, = card_keys(name, [post])
+            html = cache.get(key)
+        else:
+            html = post.cached_card
+        record(f'{name}:card', html is not None)
+        if html is None:
+            html = self.nodelist.render(context)
+            cache.set(key, html, settings.FRAGMENT_CACHE_TIMEOUT)
+        return html
+
+
+def parse_cache_tag(parser, token, node_class):
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' принимает имя фрагмента и объект")
+    nodelist = parser.parse((f'end{bits[0]}',))
+    parser.delete_first_token()
+    return node_class(nodelist, parser.compile_filter(bits[1]),
+                      parser.compile_filter(bits[2]))
+
+
+@register.tag
+def feed_cache(parser, token):
+    """{% feed_cache 'имя' page_obj %} — кеш списка карточек страницы."""
+    return parse_cache_tag(parser, token, FeedCacheNode)
+
+
+@register.tag
+def card_cache(parser, token):
+    """{% card_cache 'имя' post %} — кеш карточки одного поста."""
+    return parse_cache_tag(parser, token, CardCacheNode)
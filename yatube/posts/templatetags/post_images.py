@@ -0,0 +1,33 @@
+from django import template
+from django.conf import settings
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from ..images import thumbnail_meta
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_image(post, variant, css_class='card-img my-2'):
+    """<img> со srcset из готовых миниатюр, без обращений к файлам.
+
+    Пока миниатюры не построены, отдаёт оригинал с размерами из базы.
+    """
+    if not post.image:
+        return ''
+    attrs = {'class': css_class, 'alt': '', 'loading': 'lazy'}
+    meta = thumbnail_meta(post)
+    if meta is None:
+        attrs.update(src=post.image.url, width=post.image_width,
+                     height=post.image_height)
+    else:
+        thumbnails = meta[variant]
+        url, width, height = thumbnails[-1]
+        attrs.update(
+            src=url, width=width, height=height,
+            srcset=', '.join(f'{thumbnail_url} {thumbnail_width}w'
+                             for thumbnail_url, thumbnail_width, _
+                             in thumbnails),
+            sizes=settings.POST_THUMBNAILS[variant]['sizes'])
+    return format_html('<img{}>', flatatt(attrs))
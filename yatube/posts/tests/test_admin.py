@@ -0,0 +1,155 @@
+import datetime
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.db import connection, models
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, Post
+from .test_query_plans import explain, is_bad_step
+
+User = get_user_model()
+
+
+def group_plans(queries):
+    """Планы запросов к posts_group без обхода результата COUNT(*)."""
+    for query in queries.captured_queries:
+        if 'FROM "posts_group"' in query['sql']:
+            yield [step for step in explain(query['sql'])
+                   if step != 'SCAN subquery']
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='')
+        cls.other_group = Group.objects.create(
+            title='Другая группа', slug='other-slug', description='')
+        cls.posts = [
+            Post.objects.create(author=cls.admin, text=f'Пост {number}',
+                                group=cls.group)
+            for number in range(5)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+
+    def changelist_counts(self, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response, [query['sql'] for query in queries.captured_queries
+                          if 'COUNT(' in query['sql']]
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=2)
+    def test_unfiltered_changelist_uses_estimate(self):
+        response, counts = self.changelist_counts()
+        self.assertEqual(counts, [])
+        self.assertGreaterEqual(response.context['cl'].result_count, 5)
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=2)
+    def test_filtered_count_is_bounded(self):
+        response, counts = self.changelist_counts(
+            {'pub_date__gte': '2000-01-01'})
+        self.assertEqual(len(counts), 1)
+        self.assertIn('LIMIT 2', counts[0])
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+    def test_changelist_rows_do_not_query_relations(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url)
+        Post.objects.bulk_create([
+            Post(author=User.objects.create_user(username=f'user{number}'),
+                 text='Ещё', group=self.other_group)
+            for number in range(5)
+        ])
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(self.url)
+        self.assertEqual(len(few), len(many))
+
+    def test_date_hierarchy_matches_distinct_dates(self):
+        for number, post in enumerate(self.posts):
+            Post.objects.filter(pk=post.pk).update(pub_date=datetime.datetime(
+                2018 + number // 2, number % 2 * 11 + 1, 15,
+                tzinfo=timezone.utc))
+        for kind in ('year', 'month'):
+            with self.subTest(kind=kind):
+                expected = list(models.QuerySet.dates(
+                    Post.objects.all(), 'pub_date', kind))
+                self.assertEqual(Post.objects.dates('pub_date', kind),
+                                 expected)
+                self.assertEqual(
+                    Post.objects.dates('pub_date', kind, order='DESC'),
+                    expected[::-1])
+        response = self.client.get(self.url, {'pub_date__year': '2019'})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_reassign_group_is_one_update(self):
+        selected = [post.pk for post in self.posts[:3]]
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, {
+                'action': 'reassign_group',
+                '_selected_action': selected,
+                'group_slug': 'other-slug',
+            })
+        updates = [query['sql'] for query in queries.captured_queries
+                   if query['sql'].startswith('UPDATE "posts_post"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            Post.objects.filter(group=self.other_group).count(), 3)
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual((self.group.post_count, self.other_group.post_count),
+                         (2, 3))
+
+    def test_reassign_to_no_group(self):
+        self.client.post(self.url, {
+            'action': 'reassign_group',
+            '_selected_action': [self.posts[0].pk],
+            'group_slug': '',
+        })
+        self.assertIsNone(Post.objects.get(pk=self.posts[0].pk).group)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 4)
+
+    def test_group_autocomplete(self):
+        response = self.client.get(
+            reverse('admin:posts_group_autocomplete'), {'term': 'Друг'})
+        self.assertEqual([item['text'] for item in response.json()['results']],
+                         ['other-slug'])
+
+    def test_group_search_uses_indexes(self):
+        url = reverse('admin:posts_group_changelist')
+        for term, expected in (('друг', ['other-slug']),
+                               ('test', ['test-slug']),
+                               ('группа', [])):
+            with self.subTest(term=term):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, {'q': term})
+                groups = response.context['cl'].result_list
+                self.assertEqual([group.slug for group in groups], expected)
+                # сортируются только найденные по префиксу строки
+                for plan in group_plans(queries):
+                    self.assertFalse([step for step in plan
+                                      if step.startswith('SCAN posts_group')],
+                                     plan)
+
+    def test_group_changelist_ordered_by_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('admin:posts_group_changelist'))
+        listing = [query for query in queries.captured_queries
+                   if 'ORDER BY "posts_group"."title_key"' in query['sql']]
+        self.assertTrue(listing)
+        for query in listing:
+            plan = explain(query['sql'])
+            self.assertFalse([step for step in plan if is_bad_step(step)],
+                             plan)
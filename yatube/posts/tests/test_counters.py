@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from users.models import Profile
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostCountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='den')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.group2 = Group.objects.create(
+            title='Тестовая группа 2',
+            slug='test-slug2',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assertCounts(self, author, group, group2):
+        self.user.profile.refresh_from_db()
+        self.group.refresh_from_db()
+        self.group2.refresh_from_db()
+        self.assertEqual(self.user.profile.post_count, author)
+        self.assertEqual(self.group.post_count, group)
+        self.assertEqual(self.group2.post_count, group2)
+
+    def test_profile_created_with_user(self):
+        self.assertTrue(Profile.objects.filter(user=self.user).exists())
+
+    def test_create_and_delete(self):
+        post = Post.objects.create(author=self.user, text='Текст',
+                                   group=self.group)
+        Post.objects.create(author=self.user, text='Текст без группы')
+        self.assertCounts(2, 1, 0)
+        post.delete()
+        self.assertCounts(1, 0, 0)
+
+    def test_bulk_create(self):
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'Текст {number}', group=self.group)
+            for number in range(3)
+        ])
+        self.assertCounts(3, 3, 0)
+
+    def test_post_edit_moves_post_between_groups(self):
+        post = Post.objects.create(author=self.user, text='Текст',
+                                   group=self.group)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            data={'text': 'Текст', 'group': self.group2.pk})
+        self.assertCounts(1, 0, 1)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            data={'text': 'Текст', 'group': ''})
+        self.assertCounts(1, 0, 0)
+
+    def test_rebuild_command(self):
+        Post.objects.create(author=self.user, text='Текст', group=self.group)
+        Profile.objects.update(post_count=100)
+        Group.objects.update(post_count=100)
+        Profile.objects.filter(user=self.user).delete()
+        call_command('rebuild_post_counts', stdout=StringIO())
+        self.user.refresh_from_db()
+        self.assertCounts(1, 1, 0)
+
+    def test_pages_show_counter(self):
+        Post.objects.create(author=self.user, text='Текст', group=self.group)
+        Profile.objects.filter(user=self.user).update(post_count=42)
+        response = self.authorized_client.get(
+            reverse('posts:profile', kwargs={'username': self.user}))
+        self.assertEqual(response.context['post_count'], 42)
+        self.assertEqual(response.context['page_obj'].paginator.count, 42)
@@ -0,0 +1,106 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.cache import ENTRY_PREFIX, LOCK_PREFIX
+
+from ..cache import invalidate_posts
+from ..detail import DETAIL_PREFIX, get_post_detail
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostDetailCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='den', first_name='Денис', last_name='Иванов')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Первый пост', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        # у авторизованного клиента нет кеша страниц
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('posts:post_detail',
+                           kwargs={'post_id': self.post.pk})
+
+    def detail(self):
+        return self.client.get(self.url).content.decode()
+
+    def test_cached_payload_needs_no_queries(self):
+        self.detail()
+        with self.assertNumQueries(0):
+            post, count_post = get_post_detail(self.post.pk)
+        self.assertIsInstance(post, Post)
+        self.assertEqual(post, self.post)
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.author.get_full_name(), 'Денис Иванов')
+        self.assertEqual(count_post, 1)
+        # сессия и пользователь, сам пост из кеша
+        with self.assertNumQueries(2):
+            self.assertIn('Первый пост', self.detail())
+
+    def test_changes_invalidate_payload(self):
+        self.detail()
+        changes = (
+            (lambda: self.client.post(
+                reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+                {'text': 'Новый текст', 'group': self.group.pk}),
+             'Новый текст'),
+            (lambda: self.rename_group('Новая группа'), 'Новая группа'),
+            (lambda: self.rename_author('Пётр'), 'Пётр Иванов'),
+            (lambda: Post.objects.create(author=self.user, text='Ещё'),
+             '<span >2</span>'),
+        )
+        for change, expected in changes:
+            with self.subTest(expected=expected):
+                change()
+                self.assertIn(expected, self.detail())
+
+    def rename_group(self, title):
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = title
+        group.save()
+
+    def rename_author(self, first_name):
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = first_name
+        user.save()
+
+    def test_deleted_post_is_not_found(self):
+        self.detail()
+        Post.objects.filter(pk=self.post.pk).delete()
+        self.assertEqual(self.client.get(self.url).status_code,
+                         HTTPStatus.NOT_FOUND)
+
+    def test_stale_payload_is_served_while_another_request_rebuilds(self):
+        self.detail()
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        invalidate_posts([self.post])
+        cache.add(LOCK_PREFIX + DETAIL_PREFIX + str(self.post.pk), True)
+        with self.assertNumQueries(0):
+            post, _ = get_post_detail(self.post.pk)
+        self.assertEqual(post.text, 'Первый пост')
+
+    @override_settings(CACHE_LOCK_WAIT=0)
+    def test_waiter_builds_itself_when_no_payload_appears(self):
+        key = DETAIL_PREFIX + str(self.post.pk)
+        cache.add(LOCK_PREFIX + key, True)
+        with self.assertNumQueries(1):
+            post, _ = get_post_detail(self.post.pk)
+        self.assertEqual(post.text, 'Первый пост')
+        self.assertIsNone(cache.get(ENTRY_PREFIX + key))
+        with self.assertRaises(Http404):
+            get_post_detail(10 ** 6)
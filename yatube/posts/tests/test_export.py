@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='den')
+        cls.other_user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Текст, с "кавычками"', group=cls.group)
+        Post.objects.create(author=cls.user, text='Без группы')
+        Post.objects.create(author=cls.other_user, text='Чужой',
+                            group=cls.group)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_group_export_csv(self):
+        response = self.guest_client.get(
+            reverse('posts:group_export', kwargs={'slug': 'test-slug'}))
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+        self.assertEqual([row['author'] for row in rows], ['auth', 'den'])
+        self.assertEqual(rows[1]['text'], ExportTests.post.text)
+        self.assertEqual(rows[1]['group'], 'test-slug')
+
+    def test_profile_export_jsonl(self):
+        response = self.guest_client.get(
+            reverse('posts:profile_export', kwargs={'username': 'den'}),
+            {'format': 'jsonl'})
+        records = [json.loads(line)
+                   for line in self.read(response).splitlines()]
+        self.assertEqual({record['text'] for record in records},
+                         {ExportTests.post.text, 'Без группы'})
+
+    def test_unknown_scope_or_format(self):
+        for url in (
+            reverse('posts:group_export', kwargs={'slug': 'nope'}),
+            reverse('posts:profile_export', kwargs={'username': 'den'})
+            + '?format=xml',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code,
+                                 HTTPStatus.NOT_FOUND)
+
+    def test_export_command(self):
+        out = io.StringIO()
+        call_command('export_posts', '--author', 'den', '--chunk-size', '1',
+                     stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
@@ -0,0 +1,118 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+from .test_query_plans import explain, is_bad_step
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='den')
+        cls.other_user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Пост в группе', group=cls.group)
+        Post.objects.create(author=cls.other_user, text='Чужой пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.urls = {
+            reverse('posts:index_rss'): 2,
+            reverse('posts:index_atom'): 2,
+            reverse('posts:group_rss', kwargs={'slug': 'test-slug'}): 1,
+            reverse('posts:group_atom', kwargs={'slug': 'test-slug'}): 1,
+            reverse('posts:profile_rss', kwargs={'username': 'den'}): 1,
+            reverse('posts:profile_atom', kwargs={'username': 'den'}): 1,
+        }
+
+    def test_feeds_list_scoped_posts(self):
+        for url, count in self.urls.items():
+            with self.subTest(url=url):
+                content = self.guest_client.get(url).content.decode()
+                tag = '<entry>' if 'atom' in url else '<item>'
+                self.assertEqual(content.count(tag), count)
+                self.assertIn(FeedTests.post.text, content)
+
+    def test_unchanged_poll_is_one_indexed_query(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    by_etag = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=first['ETag'])
+                    by_date = self.guest_client.get(
+                        url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+                self.assertEqual(len(queries), 2)
+                for query in queries.captured_queries:
+                    plan = explain(query['sql'])
+                    self.assertFalse([step for step in plan
+                                      if is_bad_step(step)], plan)
+                for response in (by_etag, by_date):
+                    self.assertEqual(response.status_code,
+                                     HTTPStatus.NOT_MODIFIED)
+
+    def test_repeated_poll_is_served_from_cache(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with self.assertNumQueries(1):
+                    second = self.guest_client.get(url)
+                self.assertEqual(first.content, second.content)
+
+    def test_new_and_edited_posts_change_validators(self):
+        url = reverse('posts:group_rss', kwargs={'slug': 'test-slug'})
+        first = self.guest_client.get(url)
+        post = FeedTests.post
+        post.text = 'Исправленный пост'
+        post.save()
+        edited = self.guest_client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(edited.status_code, HTTPStatus.OK)
+        self.assertIn('Исправленный пост', edited.content.decode())
+        Post.objects.create(author=self.user, text='Новый', group=self.group)
+        created = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=edited['ETag'])
+        self.assertEqual(created.content.decode().count('<item>'), 2)
+
+    def test_group_and_author_changes_change_validators(self):
+        group_url = reverse('posts:group_rss', kwargs={'slug': 'test-slug'})
+        author_url = reverse('posts:profile_atom', kwargs={'username': 'den'})
+        group_first = self.guest_client.get(group_url)
+        author_first = self.guest_client.get(author_url)
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Денис'
+        user.save()
+        for url, first, text in (
+                (group_url, group_first, 'Новое название'),
+                (author_url, author_first, 'Денис')):
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=first['ETag'])
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertNotEqual(response['ETag'], first['ETag'])
+                self.assertIn(text, response.content.decode())
+
+    def test_unknown_scope_returns_404(self):
+        for url in (reverse('posts:group_rss', kwargs={'slug': 'nope'}),
+                    reverse('posts:profile_atom',
+                            kwargs={'username': 'nobody'})):
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code,
+                                 HTTPStatus.NOT_FOUND)
@@ -0,0 +1,165 @@
+import json
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.testing import QueryBudgetTestMixin
+from jobs.queue import run_pending
+
+from ..models import Follow, Post, TimelineEntry
+from ..paginator import encode_cursor
+from .test_query_plans import explain, is_bad_step
+
+User = get_user_model()
+
+
+@override_settings(JOBS_EAGER=True)
+class FollowTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def follow(self, author):
+        return self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': author.username}))
+
+    def feed(self, **params):
+        response = self.client.get(reverse('posts:follow_index'), params)
+        return response, list(response.context['page_obj'])
+
+    def test_follow_and_unfollow(self):
+        self.follow(self.author)
+        self.follow(self.author)
+        self.assertEqual(Follow.objects.filter(user=self.reader).count(), 1)
+        self.author.profile.refresh_from_db()
+        self.assertEqual(self.author.profile.follower_count, 1)
+        self.client.get(reverse('posts:profile_unfollow',
+                                kwargs={'username': self.author.username}))
+        self.assertFalse(Follow.objects.exists())
+        self.author.profile.refresh_from_db()
+        self.assertEqual(self.author.profile.follower_count, 0)
+
+    def test_cannot_follow_self(self):
+        self.follow(self.reader)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_new_post_is_fanned_out_to_followers_only(self):
+        self.follow(self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        Post.objects.create(author=self.other, text='Чужой пост')
+        self.assertEqual(self.feed()[1], [post])
+        guest = Client()
+        guest.force_login(self.other)
+        response = guest.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']), [])
+
+    @override_settings(JOBS_EAGER=False)
+    def test_fan_out_runs_in_background_job(self):
+        self.follow(self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(self.feed()[1], [])
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(self.feed()[1], [post])
+
+    def test_follow_backfills_and_unfollow_drops_entries(self):
+        old = Post.objects.create(author=self.author, text='Старый пост')
+        self.follow(self.author)
+        self.assertEqual(self.feed()[1], [old])
+        Follow.objects.get(user=self.reader).delete()
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    @override_settings(TIMELINE_BATCH_SIZE=2)
+    def test_fan_out_in_batches(self):
+        readers = [User.objects.create_user(username=f'reader{number}')
+                   for number in range(5)]
+        Follow.objects.bulk_create(Follow(user=reader, author=self.author)
+                                   for reader in readers)
+        post = Post.objects.create(author=self.author, text='Текст')
+        self.assertEqual(
+            TimelineEntry.objects.filter(post=post).count(), len(readers))
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_high_follower_authors_are_merged_at_read_time(self):
+        self.follow(self.author)
+        self.follow(self.other)
+        Follow.objects.create(user=self.author, author=self.other)
+        star_post = Post.objects.create(author=self.other, text='Звезда')
+        post = Post.objects.create(author=self.author, text='Обычный')
+        self.assertFalse(TimelineEntry.objects.filter(post=star_post)
+                         .exists())
+        self.assertEqual(self.feed()[1], [post, star_post])
+
+    def test_cursor_pagination(self):
+        self.follow(self.author)
+        for number in range(settings.COUNT_IN_PAGES + 3):
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+        response, first = self.feed()
+        self.assertEqual(len(first), settings.COUNT_IN_PAGES)
+        page_obj = response.context['page_obj']
+        response, second = self.feed(after=page_obj.next_cursor)
+        self.assertEqual(len(second), 3)
+        self.assertFalse(set(first) & set(second))
+        self.assertFalse(response.context['page_obj'].has_next())
+
+    def test_future_before_cursor_shows_first_page(self):
+        future = encode_cursor(timezone.now() + timedelta(days=1), 10 ** 9)
+        response, posts = self.feed(before=future)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(posts, [])
+        self.assertIsNone(response.context['page_obj'].next_cursor)
+        self.follow(self.author)
+        post = Post.objects.create(author=self.author, text='Пост')
+        response, posts = self.feed(before=future)
+        self.assertEqual(posts, [post])
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_follow_index_within_budget(self):
+        self.follow(self.author)
+        Post.objects.create(author=self.author, text='Пост')
+        self.assertWithinQueryBudget(self.client,
+                                     reverse('posts:follow_index'))
+
+    def test_timeline_query_uses_index(self):
+        self.follow(self.author)
+        Post.objects.create(author=self.author, text='Пост')
+        with CaptureQueriesContext(connection) as queries:
+            self.feed()
+        sql = next(query['sql'] for query in queries.captured_queries
+                   if 'posts_timelineentry' in query['sql'])
+        plan = explain(sql)
+        self.assertFalse([step for step in plan if is_bad_step(step)], plan)
+
+    def test_follow_index_requires_login(self):
+        response = Client().get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 302)
+
+
+class BenchTimelineCommandTests(TestCase):
+    def test_both_strategies_are_measured(self):
+        call_command('seed_bench', '--posts', '30', '--users', '5',
+                     '--groups', '2', stdout=StringIO())
+        out = StringIO()
+        call_command('bench_timeline', '--repeat', '1', '--depth', '2',
+                     '--json', stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report), {'push', 'pull'})
+        self.assertIn('deep', report['pull']['read'])
+        self.assertFalse(User.objects.filter(
+            username__startswith='bench_timeline').exists())
+        self.assertFalse(Follow.objects.exists())
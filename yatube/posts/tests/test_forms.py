@@ -1,11 +1,14 @@
 from http import HTTPStatus
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from ..forms import PostForm
 from ..models import Group, Post
+from .test_query_plans import explain, is_bad_step
 
 User = get_user_model()
 
@@ -79,3 +82,64 @@ class PostsFormTest(TestCase):
         self.assertRedirects(response,
                              f"{reverse_login}?next={reverse_post_create}")
         self.assertEqual(post_count, new_post_count)
+
+
+class GroupAutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='den')
+        Group.objects.bulk_create(
+            Group(title=f'Группа {number}', slug=f'group-{number}',
+                  description='') for number in range(30))
+        cls.moscow = Group.objects.create(title='Москва', slug='msk',
+                                          description='')
+        cls.sport = Group.objects.create(title='Спорт', slug='moscow-sport',
+                                         description='')
+
+    def autocomplete(self, query):
+        response = self.client.get(reverse('posts:group_autocomplete'),
+                                   {'q': query})
+        return [group['slug'] for group in response.json()['results']]
+
+    def test_prefix_matches_title_ignoring_case_and_slug(self):
+        self.assertEqual(self.autocomplete('мОс'), ['msk'])
+        self.assertEqual(self.autocomplete('mos'), ['moscow-sport'])
+        self.assertEqual(self.autocomplete('Группа 1'), [
+            'group-1', *(f'group-{number}' for number in range(10, 20))])
+
+    @override_settings(GROUP_AUTOCOMPLETE_LIMIT=5)
+    def test_result_size_is_bounded(self):
+        self.assertEqual(len(self.autocomplete('')), 5)
+        self.assertEqual(len(self.autocomplete('гр')), 5)
+
+    def test_search_uses_indexes(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.autocomplete('zzz')
+        self.assertEqual(len(queries), 2)
+        for query in queries.captured_queries:
+            plan = explain(query['sql'])
+            self.assertFalse([step for step in plan if is_bad_step(step)],
+                             plan)
+
+    def test_form_renders_only_selected_group(self):
+        post = Post.objects.create(author=self.user, text='Текст',
+                                   group=self.moscow)
+        client = Client()
+        client.force_login(self.user)
+        for url in (reverse('posts:post_create'),
+                    reverse('posts:post_edit', kwargs={'post_id': post.pk})):
+            with self.subTest(url=url):
+                content = client.get(url).content.decode()
+                self.assertNotIn('group-1', content)
+                self.assertIn('group_autocomplete.js', content)
+        self.assertIn('<option value="%s" selected>msk</option>'
+                      % self.moscow.pk, content)
+
+    def test_group_is_validated_by_one_lookup(self):
+        with CaptureQueriesContext(connection) as queries:
+            form = PostForm(data={'text': 'Текст', 'group': self.sport.pk})
+            self.assertTrue(form.is_valid())
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(form.cleaned_data['group'], self.sport)
+        form = PostForm(data={'text': 'Текст', 'group': 10 ** 6})
+        self.assertIn('group', form.errors)
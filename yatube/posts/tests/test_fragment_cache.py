@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..cache import fragment_cache_stats
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FragmentCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='den')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Первый пост', group=cls.group)
+        cls.other_post = Post.objects.create(
+            author=cls.user, text='Второй пост')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def get_index(self):
+        return self.authorized_client.get(reverse('posts:index'))
+
+    def stats_delta(self, before, name):
+        after = fragment_cache_stats()
+        return {kind: after.get((name, kind), 0) - before.get((name, kind), 0)
+                for kind in ('hit', 'miss')}
+
+    def test_repeated_page_is_served_from_cache(self):
+        first = self.get_index()
+        before = fragment_cache_stats()
+        second = self.get_index()
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(self.stats_delta(before, 'index:page'),
+                         {'hit': 1, 'miss': 0})
+
+    def test_post_edit_invalidates_only_its_card(self):
+        self.get_index()
+        self.authorized_client.post(
+            reverse('posts:post_edit',
+                    kwargs={'post_id': FragmentCacheTests.post.pk}),
+            data={'text': 'Исправленный пост',
+                  'group': FragmentCacheTests.group.pk})
+        before = fragment_cache_stats()
+        response = self.get_index()
+        self.assertContains(response, 'Исправленный пост')
+        self.assertNotContains(response, 'Первый пост')
+        self.assertEqual(self.stats_delta(before, 'index:card'),
+                         {'hit': 1, 'miss': 1})
+
+    def test_new_and_deleted_posts_change_page(self):
+        self.get_index()
+        Post.objects.create(author=self.user, text='Новый пост')
+        self.assertContains(self.get_index(), 'Новый пост')
+        FragmentCacheTests.other_post.delete()
+        self.assertNotContains(self.get_index(), 'Второй пост')
+
+    def test_group_and_author_changes_invalidate_cards(self):
+        self.get_index()
+        group = FragmentCacheTests.group
+        group.slug = 'new-slug'
+        group.save()
+        self.assertContains(self.get_index(), '/group/new-slug/')
+        user = FragmentCacheTests.user
+        user.first_name = 'Денис'
+        user.save()
+        self.assertContains(self.get_index(), 'Денис')
@@ -0,0 +1,126 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from jobs.models import Job
+from jobs.queue import run_pending
+
+from ..images import build_thumbnails, thumbnail_meta
+from ..models import Group, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def uploaded_image(name='picture.png', size=(1200, 600)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'lightskyblue').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, JOBS_EAGER=True)
+class PostImageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='den')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def page_urls(self, post):
+        return (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+        )
+
+    def test_upload_builds_thumbnails_for_srcset(self):
+        self.authorized_client.post(reverse('posts:post_create'), data={
+            'text': 'Пост с картинкой',
+            'group': self.group.pk,
+            'image': uploaded_image(),
+        })
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertEqual((post.image_width, post.image_height), (1200, 600))
+        meta = thumbnail_meta(post)
+        self.assertEqual([width for _, width, _ in meta['card']],
+                         [320, 640, 960])
+        self.assertEqual([width for _, width, _ in meta['detail']],
+                         [480, 960, 1200])
+        content = self.client.get(reverse('posts:index')).content.decode()
+        self.assertIn('320w', content)
+        self.assertIn('height="339"', content)
+        self.assertIn('width="960"', content)
+        detail = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        self.assertIn('960w', detail.content.decode())
+
+    def test_pages_never_open_files(self):
+        post = Post.objects.create(author=self.user, group=self.group,
+                                   text='Текст', image=uploaded_image())
+        cache.clear()
+        build_thumbnails(post.pk)
+        forbidden = mock.Mock(side_effect=AssertionError('файловая система'))
+        with mock.patch.multiple(FileSystemStorage, open=forbidden,
+                                 exists=forbidden, size=forbidden):
+            for url in self.page_urls(post):
+                with self.subTest(url=url):
+                    response = self.client.get(url)
+                    self.assertIn('srcset=', response.content.decode())
+
+    def test_original_is_shown_until_thumbnails_are_built(self):
+        with mock.patch('posts.signals.schedule_thumbnails') as schedule:
+            post = Post.objects.create(author=self.user, text='Текст',
+                                       image=uploaded_image())
+        schedule.assert_called_once()
+        content = self.client.get(reverse('posts:index')).content.decode()
+        self.assertIn(f'src="{post.image.url}"', content)
+        self.assertIn('height="600"', content)
+        self.assertIn('width="1200"', content)
+        self.assertNotIn('srcset=', content)
+
+    @override_settings(JOBS_EAGER=False)
+    def test_worker_result_is_seen_by_later_requests(self):
+        post = Post.objects.create(author=self.user, text='Текст',
+                                   image=uploaded_image())
+        self.assertTrue(Job.objects.filter(
+            name__endswith='build_thumbnails').exists())
+        self.assertNotIn('srcset', self.client.get(
+            reverse('posts:index')).content.decode())
+        # правка поста, загруженного до сборки, не затирает миниатюры
+        stale = Post.objects.get(pk=post.pk)
+        run_pending()
+        stale.text = 'Новый текст'
+        stale.save()
+        # кеш воркера — другой процесс: метаданные читаются из базы
+        cache.clear()
+        with mock.patch('posts.images.enqueue') as enqueue:
+            content = self.client.get(reverse('posts:index')).content
+        self.assertIn('320w', content.decode())
+        enqueue.assert_not_called()
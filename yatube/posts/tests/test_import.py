@@ -0,0 +1,130 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from jobs.queue import run_pending
+
+from ..lookups import authors, groups
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class ImportPostsCommandTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='den')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(content)
+        return path
+
+    def write_jsonl(self, records):
+        return self.write('posts.jsonl', '\n'.join(
+            json.dumps(record, ensure_ascii=False) for record in records))
+
+    def import_posts(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command('import_posts', path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_jsonl(self):
+        path = self.write_jsonl([
+            {'type': 'user', 'username': 'auth', 'first_name': 'Иван'},
+            {'type': 'group', 'slug': 'cats', 'title': 'Коты'},
+            {'author': 'auth', 'group': 'cats', 'text': 'Старый пост',
+             'pub_date': '2010-05-01T10:00:00+00:00'},
+            {'author': 'den', 'text': 'Пост без группы'},
+        ])
+        out, err = self.import_posts(path, '--batch-size', '2')
+        self.assertIn('строк/с', out)
+        self.assertEqual(err, '')
+        post = Post.objects.get(text='Старый пост')
+        self.assertEqual(post.pub_date,
+                         datetime(2010, 5, 1, 10, tzinfo=timezone.utc))
+        self.assertEqual(post.updated_at, post.pub_date)
+        self.assertEqual(post.author.first_name, 'Иван')
+        self.assertEqual(post.group.title, 'Коты')
+        self.assertEqual(post.group.post_count, 1)
+        self.assertEqual(post.author.profile.post_count, 1)
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.post_count, 1)
+
+    def test_import_csv(self):
+        Group.objects.create(title='Коты', slug='cats', description='')
+        path = self.write('posts.csv', (
+            'author,group,text,pub_date\n'
+            'den,cats,"Первый, с запятой",2020-01-01T00:00:00\n'
+            'den,,Второй,\n'
+        ))
+        self.import_posts(path)
+        self.assertEqual(Post.objects.filter(group__slug='cats').count(), 1)
+        self.assertTrue(Post.objects.filter(text='Второй',
+                                            group=None).exists())
+
+    def test_unknown_author_is_skipped_unless_created(self):
+        path = self.write_jsonl([{'author': 'ghost', 'text': 'Текст'},
+                                 {'author': 'den', 'text': 'Текст'}])
+        out, err = self.import_posts(path)
+        self.assertIn('ghost', err)
+        self.assertEqual(Post.objects.count(), 1)
+        self.import_posts(path, '--create-missing')
+        self.assertTrue(Post.objects.filter(author__username='ghost')
+                        .exists())
+
+    def test_non_object_lines_are_skipped(self):
+        path = self.write('posts.jsonl', '\n'.join([
+            '[]', '1', '"x"', 'null', '{не json',
+            json.dumps({'author': 'den', 'text': 'Текст'}),
+        ]))
+        out, err = self.import_posts(path)
+        self.assertIn('пропущено 5', out)
+        self.assertEqual(err.count('пропущена'), 5)
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_resume_from_checkpoint(self):
+        path = self.write_jsonl([
+            {'author': 'den', 'text': f'Пост {number}'}
+            for number in range(5)
+        ])
+        self.import_posts(path, '--batch-size', '2')
+        with open(f'{path}.checkpoint', encoding='utf-8') as stream:
+            self.assertEqual(json.load(stream), {'line': 5})
+        self.import_posts(path, '--resume')
+        self.assertEqual(Post.objects.count(), 5)
+
+    @override_settings(LOOKUP_BLOOM_REBUILD_INTERVAL=3600,
+                       LOOKUP_BLOOM_CHECK_INTERVAL=0, JOBS_EAGER=False)
+    def test_imported_authors_and_groups_pass_bloom_filter(self):
+        cache.clear()
+        groups.reset()
+        authors.reset()
+        profile = reverse('posts:profile', kwargs={'username': 'newbie'})
+        group = reverse('posts:group_list', kwargs={'slug': 'newgrp'})
+        # фильтры собраны до импорта и не знают новых значений
+        self.assertEqual(self.client.get(profile).status_code,
+                         HTTPStatus.NOT_FOUND)
+        self.assertEqual(self.client.get(group).status_code,
+                         HTTPStatus.NOT_FOUND)
+        run_pending()
+        self.assertIsNone(authors.get('nobody'))
+        self.assertIsNone(groups.get('nobody'))
+        self.assertIsNotNone(authors.bloom)
+        self.assertIsNotNone(groups.bloom)
+        self.import_posts(self.write_jsonl([
+            {'author': 'newbie', 'group': 'newgrp', 'text': 'Новый пост'},
+        ]), '--create-missing')
+        self.assertEqual(self.client.get(profile).status_code, HTTPStatus.OK)
+        self.assertEqual(self.client.get(group).status_code, HTTPStatus.OK)
@@ -0,0 +1,155 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.lru import BloomFilter, LRUCache
+from jobs.models import Job
+from jobs.queue import run_pending
+
+from ..lookups import authors, groups
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class LRUCacheTests(TestCase):
+    def test_size_is_bounded(self):
+        lru = LRUCache(2)
+        lru.set('a', 1, 60)
+        lru.set('b', 2, 60)
+        lru.get('a')
+        lru.set('c', 3, 60)
+        self.assertEqual(len(lru), 2)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('a'), 1)
+
+    def test_entries_expire(self):
+        lru = LRUCache(2)
+        with mock.patch('core.lru.time.monotonic', return_value=100):
+            lru.set('a', 1, 10)
+        with mock.patch('core.lru.time.monotonic', return_value=111):
+            self.assertIsNone(lru.get('a'))
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        for number in range(1000):
+            bloom.add(f'slug-{number}')
+        self.assertTrue(all(f'slug-{number}' in bloom
+                            for number in range(1000)))
+        false_positives = sum(f'other-{number}' in bloom
+                              for number in range(1000))
+        self.assertLess(false_positives, 50)
+
+
+@override_settings(LOOKUP_BLOOM_REBUILD_INTERVAL=0,
+                   LOOKUP_BLOOM_CHECK_INTERVAL=0, JOBS_EAGER=False)
+class CachedLookupTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='den')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        groups.reset()
+        authors.reset()
+
+    def test_repeated_lookup_skips_database(self):
+        groups.get('test-slug')
+        with self.assertNumQueries(0):
+            self.assertEqual(groups.get('test-slug'), self.group)
+        self.assertEqual(authors.get('den'), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(authors.get('den').profile.post_count, 0)
+
+    def build_blooms(self):
+        # фильтр строит воркер; следующий запрос берёт его из общего кеша
+        groups.get('test-slug')
+        authors.get('den')
+        run_pending()
+
+    def test_unknown_values_rejected_by_bloom_filter(self):
+        self.build_blooms()
+        with self.assertNumQueries(0):
+            self.assertIsNone(groups.get('no-such-slug'))
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'nobody'}))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        with self.assertNumQueries(0):
+            self.assertIsNone(authors.get('nobody-else'))
+
+    @override_settings(LOOKUP_BLOOM_REBUILD_INTERVAL=3600)
+    def test_cold_bloom_filter_is_built_off_the_request(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIsNone(groups.get('no-such-slug'))
+        # индексный поиск и вставка задачи, без просмотра таблицы
+        self.assertEqual(len(queries), 2)
+        self.assertTrue(all('WHERE' in query['sql'] or 'INSERT' in query['sql']
+                            for query in queries.captured_queries))
+        self.assertEqual(Job.objects.count(), 1)
+        groups.get('other-slug')
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_unrelated_changes_keep_other_entries_and_bloom(self):
+        other = User.objects.create_user(username='other')
+        self.build_blooms()
+        authors.get('other')
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Денис'
+        user.set_password('новый-пароль')
+        user.save()
+        group = Group.objects.get(pk=self.group.pk)
+        group.description = 'Новое описание'
+        group.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(authors.get('other'), other)
+            self.assertIsNone(authors.get('nobody'))
+            self.assertIsNone(groups.get('no-such-slug'))
+        self.assertEqual(authors.get('den').first_name, 'Денис')
+        self.assertEqual(groups.get('test-slug').description,
+                         'Новое описание')
+
+    @override_settings(LOOKUP_BLOOM_REBUILD_INTERVAL=3600)
+    def test_misses_are_cached_while_bloom_filter_is_stale(self):
+        groups.get('test-slug')
+        Group.objects.create(title='Новая', slug='new-slug')
+        self.assertIsNone(groups.get('missing'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(groups.get('missing'))
+        self.assertEqual(groups.get('new-slug').title, 'Новая')
+
+    def test_create_rename_and_delete_invalidate(self):
+        self.assertIsNone(groups.get('fresh'))
+        group = Group.objects.create(title='Свежая', slug='fresh')
+        self.assertEqual(groups.get('fresh'), group)
+        group.slug = 'renamed'
+        group.save()
+        self.assertIsNone(groups.get('fresh'))
+        self.assertEqual(groups.get('renamed'), group)
+        group.delete()
+        self.assertIsNone(groups.get('renamed'))
+
+    def test_post_counts_stay_fresh(self):
+        self.assertEqual(groups.get('test-slug').post_count, 0)
+        self.assertEqual(authors.get('den').profile.post_count, 0)
+        Post.objects.create(author=self.user, group=self.group,
+                            text='Текст')
+        self.assertEqual(groups.get('test-slug').post_count, 1)
+        self.assertEqual(authors.get('den').profile.post_count, 1)
+
+    def test_login_keeps_author_cached(self):
+        authors.get('den')
+        self.client.force_login(self.user)
+        with self.assertNumQueries(0):
+            authors.get('den')
@@ -0,0 +1,93 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='den')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Первый пост', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'den'}),
+            reverse('posts:post_detail',
+                    kwargs={'post_id': AnonymousPageCacheTests.post.pk}),
+        )
+
+    def test_repeated_request_runs_no_queries(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.guest_client.get(url)
+                self.assertEqual(first.content, second.content)
+                self.assertEqual(first['ETag'], second['ETag'])
+                self.assertIn('Last-Modified', second)
+
+    def test_conditional_get_returns_not_modified(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                by_etag = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=first['ETag'])
+                by_date = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+                for response in (by_etag, by_date):
+                    self.assertEqual(response.status_code,
+                                     HTTPStatus.NOT_MODIFIED)
+                    self.assertEqual(response.content, b'')
+
+    def test_changes_invalidate_pages(self):
+        first = [self.guest_client.get(url) for url in self.urls]
+        self.authorized_client.post(
+            reverse('posts:post_edit',
+                    kwargs={'post_id': AnonymousPageCacheTests.post.pk}),
+            data={'text': 'Исправленный пост',
+                  'group': AnonymousPageCacheTests.group.pk})
+        for url, old in zip(self.urls, first):
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=old['ETag'])
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertContains(response, 'Исправленный пост')
+
+    def test_related_changes_invalidate_pages(self):
+        detail_url = self.urls[-1]
+        self.guest_client.get(reverse('posts:index'))
+        self.guest_client.get(detail_url)
+        group = AnonymousPageCacheTests.group
+        group.slug = 'new-slug'
+        group.save()
+        self.assertContains(self.guest_client.get(reverse('posts:index')),
+                            '/group/new-slug/')
+        Post.objects.create(author=self.user, text='Ещё пост')
+        response = self.guest_client.get(detail_url)
+        self.assertEqual(response.context['count_post'], 2)
+
+    def test_authorized_requests_bypass_cache(self):
+        self.authorized_client.get(self.urls[0])
+        response = self.authorized_client.get(self.urls[0])
+        self.assertIsNotNone(response.context)
+        self.assertNotIn('ETag', response)
@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.query_budget import (QueryBudgetExceeded, budget_exempt,
+                               query_budget)
+from core.testing import QueryBudgetTestMixin
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostsQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        # разные авторы и группы, чтобы N+1 был заметен
+        authors = [User.objects.create_user(username=f'author{number}')
+                   for number in range(5)]
+        groups = [Group.objects.create(title=f'Группа {number}',
+                                       slug=f'group-{number}',
+                                       description='Описание')
+                  for number in range(5)]
+        Post.objects.bulk_create([Post(
+            author=authors[number % 5],
+            text=f'Тест текст {number}',
+            group=groups[number % 5]) for number in range(15)
+        ])
+        cls.post = Post.objects.create(
+            author=cls.user, text='Текстовый текст', group=cls.group)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_read_views_within_budget(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', kwargs={'slug': 'group-1'}),
+            reverse('posts:profile', kwargs={'username': 'author1'}),
+            reverse('posts:post_detail',
+                    kwargs={'post_id': PostsQueryBudgetTests.post.pk}),
+        )
+        for client in (self.guest_client, self.authorized_client):
+            for url in urls:
+                with self.subTest(url=url):
+                    self.assertWithinQueryBudget(client, url)
+
+    def test_write_views_within_budget(self):
+        post_id = PostsQueryBudgetTests.post.pk
+        edit_url = reverse('posts:post_edit', kwargs={'post_id': post_id})
+        create_url = reverse('posts:post_create')
+        data = {'text': 'Текст из формы',
+                'group': PostsQueryBudgetTests.group.pk}
+        self.assertWithinQueryBudget(self.authorized_client, create_url)
+        self.assertWithinQueryBudget(self.authorized_client, edit_url)
+        self.assertWithinQueryBudget(self.authorized_client, create_url,
+                                     method='post', data=data)
+        self.assertWithinQueryBudget(self.authorized_client, edit_url,
+                                     method='post', data=data)
+
+
+class QueryBudgetDecoratorTests(TestCase):
+    def setUp(self):
+        @query_budget(1)
+        def view(request):
+            return list(User.objects.all()) + list(Group.objects.all())
+        self.view = view
+        self.request = RequestFactory().get('/')
+
+    def test_budget_is_exposed(self):
+        self.assertEqual(self.view.query_budget, 1)
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_strict_mode_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.view(self.request)
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_production_mode_logs(self):
+        with self.assertLogs('core.query_budget', level='WARNING'):
+            self.view(self.request)
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_exempt_queries_are_not_counted(self):
+        @query_budget(1)
+        def view(request):
+            with budget_exempt():
+                list(Group.objects.all())
+            return list(User.objects.all())
+        view(self.request)
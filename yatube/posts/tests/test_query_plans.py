@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+# признаки плана, при которых запрос деградирует вместе с ростом таблицы
+BAD_PLAN_MARKERS = ('USE TEMP B-TREE',)
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def is_bad_step(step):
+    if any(marker in step for marker in BAD_PLAN_MARKERS):
+        return True
+    # "SCAN posts_post" без индекса — полный проход по таблице
+    return step.startswith('SCAN') and 'INDEX' not in step
+
+
+class QueryPlanTests(TestCase):
+    """Запросы лент и страницы поста идут по индексам без сортировки."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create([Post(
+            author=cls.user,
+            text=f'Тест текст {post}',
+            group=cls.group) for post in range(1, 14)
+        ])
+        cls.post = Post.objects.first()
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def get_urls(self):
+        return (
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list',
+                    kwargs={'slug': QueryPlanTests.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': QueryPlanTests.user.username}),
+            reverse('posts:post_detail',
+                    kwargs={'post_id': QueryPlanTests.post.pk}),
+        )
+
+    def assert_plans_use_indexes(self, url):
+        # нужен настоящий проход по view, а не страница из кеша
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(url)
+        self.assertTrue(queries.captured_queries)
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            plan = explain(sql)
+            bad_steps = [step for step in plan if is_bad_step(step)]
+            self.assertFalse(bad_steps, f'{sql}\n{plan}')
+
+    def test_page_mode_plans(self):
+        for url in self.get_urls():
+            with self.subTest(url=url):
+                self.assert_plans_use_indexes(url)
+
+    @override_settings(PAGINATION_MODE='cursor')
+    def test_cursor_mode_plans(self):
+        first = self.guest_client.get(reverse('posts:index'))
+        next_cursor = first.context['page_obj'].next_cursor
+        for url in self.get_urls() + (
+            reverse('posts:index') + f'?after={next_cursor}',
+            reverse('posts:index') + f'?before={next_cursor}',
+        ):
+            with self.subTest(url=url):
+                self.assert_plans_use_indexes(url)
@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class QueryCacheTests(TransactionTestCase):
+    """Кеш запросов работает в autocommit, поэтому без TestCase."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='den')
+        self.group = Group.objects.create(title='Группа', slug='group',
+                                          description='')
+        self.post = Post.objects.create(author=self.user, text='Пост',
+                                        group=self.group)
+
+    def texts(self):
+        return list(Post.cached.filter(author=self.user)
+                    .values_list('text', flat=True))
+
+    def test_repeated_query_is_served_from_cache(self):
+        self.assertEqual(self.texts(), ['Пост'])
+        self.assertEqual(Group.cached.get(slug='group'), self.group)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.texts(), ['Пост'])
+            self.assertEqual(Group.cached.get(slug='group'), self.group)
+
+    def test_result_shape_is_part_of_key(self):
+        self.texts()
+        self.assertEqual(
+            list(Post.cached.filter(author=self.user).values('text')),
+            [{'text': 'Пост'}])
+
+    def test_count_and_exists_are_cached(self):
+        queryset = Post.cached.filter(group=self.group)
+        self.assertEqual(queryset.count(), 1)
+        self.assertTrue(queryset.exists())
+        with self.assertNumQueries(0):
+            self.assertEqual(queryset.count(), 1)
+            self.assertTrue(queryset.exists())
+
+    def test_writes_through_orm_invalidate_results(self):
+        writes = (
+            (lambda: Post.objects.create(author=self.user, text='Ещё'),
+             ['Пост', 'Ещё']),
+            (lambda: Post.objects.filter(text='Ещё').update(text='Правка'),
+             ['Пост', 'Правка']),
+            (lambda: Post.objects.bulk_create(
+                [Post(author=self.user, text='Пачка')]),
+             ['Пост', 'Правка', 'Пачка']),
+            (lambda: Post.objects.filter(text='Пачка').delete(),
+             ['Пост', 'Правка']),
+            (lambda: self.save_text('Новый'), ['Новый', 'Правка']),
+        )
+        for write, expected in writes:
+            with self.subTest(expected=expected):
+                self.texts()
+                write()
+                self.assertCountEqual(self.texts(), expected)
+
+    def save_text(self, text):
+        self.post.text = text
+        self.post.save()
+
+    def test_post_counters_keep_group_results(self):
+        titles = Group.cached.filter(slug='group').values_list('title')
+        list(titles)
+        Group.cached.get(slug='group')
+        Post.objects.create(author=self.user, text='Ещё', group=self.group)
+        with self.assertNumQueries(0):
+            self.assertEqual(list(titles.all()), [('Группа',)])
+            group = Group.cached.get(slug='group')
+        # счётчика нет в закешированном объекте, он читается из базы
+        with self.assertNumQueries(1):
+            self.assertEqual(group.post_count, 2)
+
+    def test_group_delete_clears_cached_posts(self):
+        self.assertEqual(
+            list(Post.cached.values_list('group', flat=True)),
+            [self.group.pk])
+        self.group.delete()
+        self.assertEqual(
+            list(Post.cached.values_list('group', flat=True)), [None])
+
+    def test_untracked_tables_bypass_cache(self):
+        list(Post.cached.select_related('author'))
+        with self.assertNumQueries(1):
+            list(Post.cached.select_related('author'))
+
+    def test_uncommitted_rows_are_not_cached(self):
+        self.texts()
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Post.objects.create(author=self.user, text='Откат')
+                self.assertCountEqual(self.texts(), ['Пост', 'Откат'])
+                raise RuntimeError
+        self.assertEqual(self.texts(), ['Пост'])
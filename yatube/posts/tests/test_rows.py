@@ -0,0 +1,68 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+from ..rows import PostRow
+
+User = get_user_model()
+
+
+class FeedRowsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='den', first_name='Денис', last_name='Иванов')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='')
+        cls.with_group = Post.objects.create(
+            author=cls.user, group=cls.group, text='В группе',
+            image='posts/picture.png', image_width=640, image_height=480)
+        cls.without_group = Post.objects.create(author=cls.user,
+                                                text='Без группы')
+
+    def test_rows_carry_what_feed_templates_read(self):
+        with self.assertNumQueries(1):
+            rows = list(Post.objects.feed_rows().order_by('pk'))
+        first, second = rows
+        self.assertIsInstance(first, PostRow)
+        self.assertFalse(hasattr(first, '__dict__'))
+        self.assertEqual((first.pk, first.text, first.pub_date),
+                         (self.with_group.pk, 'В группе',
+                          self.with_group.pub_date))
+        self.assertEqual(first.author.get_full_name(), 'Денис Иванов')
+        self.assertEqual(str(first.author), 'den')
+        self.assertEqual((str(first.group), first.group.title),
+                         ('group', 'Группа'))
+        self.assertEqual(first.image.url, self.with_group.image.url)
+        self.assertIsNone(second.group)
+        self.assertFalse(second.image)
+        # автор страницы — один объект на все карточки
+        self.assertIs(first.author, second.author)
+
+    def test_feeds_render_rows(self):
+        cache.clear()
+        for url in (reverse('posts:index'),
+                    reverse('posts:group_list', kwargs={'slug': 'group'}),
+                    reverse('posts:profile', kwargs={'username': 'den'})):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIsInstance(response.context['page_obj'][0],
+                                      PostRow)
+                content = response.content.decode()
+                self.assertIn('Денис Иванов', content)
+                self.assertIn(reverse('posts:group_list',
+                                      kwargs={'slug': 'group'}), content)
+
+    def test_bench_command_compares_both_paths(self):
+        out = StringIO()
+        call_command('bench_feed_rows', '--per-page', '2', '--repeat', '1',
+                     '--json', stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report['2']), {'models', 'rows'})
+        self.assertEqual(report['2']['rows']['rows'], 2)
@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class SearchViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='den')
+        cls.other_user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.best = Post.objects.create(
+            author=cls.user, text='Кот кот кот', group=cls.group)
+        cls.good = Post.objects.create(
+            author=cls.other_user, text='Кот и пёс длинный текст')
+        cls.other = Post.objects.create(
+            author=cls.user, text='Только пёс')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def search(self, **params):
+        response = self.guest_client.get(reverse('posts:search'), params)
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_results_are_ranked(self):
+        self.assertEqual(self.search(q='кот'),
+                         [SearchViewTests.best.pk, SearchViewTests.good.pk])
+
+    def test_filters_by_group_and_author(self):
+        self.assertEqual(self.search(q='кот', group='test-slug'),
+                         [SearchViewTests.best.pk])
+        self.assertEqual(self.search(q='пёс', author='auth'),
+                         [SearchViewTests.good.pk])
+
+    def test_index_follows_post_changes(self):
+        post = SearchViewTests.other
+        post.text = 'Только хомяк'
+        post.save()
+        self.assertEqual(self.search(q='хомяк'), [post.pk])
+        self.assertNotIn(post.pk, self.search(q='пёс'))
+        post.delete()
+        self.assertEqual(self.search(q='хомяк'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search(q='кот"*) ('), [
+            SearchViewTests.best.pk, SearchViewTests.good.pk])
+        self.assertEqual(self.search(q='"*'), [])
+
+    def test_cursor_pagination(self):
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'Хомяк номер {number}')
+            for number in range(settings.COUNT_IN_PAGES + 3)
+        ])
+        url = reverse('posts:search')
+        first = self.guest_client.get(url, {'q': 'хомяк'})
+        self.assertEqual(len(first.context['page_obj']),
+                         settings.COUNT_IN_PAGES)
+        second = self.guest_client.get(
+            url + '?' + first.context['next_query'])
+        self.assertEqual(len(second.context['page_obj']), 3)
+        self.assertIsNone(second.context['next_query'])
+        found = {post.pk for response in (first, second)
+                 for post in response.context['page_obj']}
+        self.assertEqual(len(found), settings.COUNT_IN_PAGES + 3)
+
+
+class AdminSearchTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        self.client.force_login(self.admin)
+        Post.objects.create(author=self.admin, text='Полнотекстовый поиск')
+        Post.objects.create(author=self.admin, text='Поиск по индексу')
+        Post.objects.create(author=self.admin, text='Другая запись')
+
+    def test_admin_search_uses_index(self):
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'поиск'})
+        self.assertEqual(response.context['cl'].result_count, 2)
@@ -0,0 +1,39 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Sum
+from django.db.models.expressions import RawSQL
+from django.test import TestCase
+
+from users.models import Profile
+
+from ..models import Group, Post
+from ..search import search_ids
+
+
+class SeedBenchCommandTests(TestCase):
+    def seed(self, *args):
+        call_command('seed_bench', '--posts', '300', '--users', '20',
+                     '--groups', '5', '--batch-size', '100', *args,
+                     stdout=StringIO())
+
+    def test_seed_creates_consistent_dataset(self):
+        self.seed()
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(
+            Profile.objects.aggregate(total=Sum('post_count'))['total'], 300)
+        self.assertEqual(
+            Group.objects.aggregate(total=Sum('post_count'))['total'],
+            Post.objects.exclude(group=None).count())
+        # индекс поиска пересобран после вставки без триггеров
+        word = Post.objects.first().text.split()[0]
+        self.assertTrue(Post.objects.filter(
+            pk__in=RawSQL(*search_ids(word))).exists())
+
+    def test_authors_follow_zipf(self):
+        self.seed('--no-group', '0')
+        counts = list(Profile.objects.filter(
+            user__username__startswith='bench_user_'
+        ).order_by('-post_count').values_list('post_count', flat=True))
+        self.assertGreater(counts[0], counts[-1] * 3)
+        self.assertFalse(Post.objects.filter(group=None).exists())
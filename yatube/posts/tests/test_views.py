@@ -1,10 +1,18 @@
+from datetime import timedelta
+from http import HTTPStatus
+
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 from ..models import Group, Post
+from ..paginator import encode_cursor
 
 User = get_user_model()
 
@@ -31,6 +39,8 @@ class PostViewsTests(TestCase):
         )
 
     def setUp(self):
+        # откат базы удаляет авторов без сигналов: сбрасываем версии lookups
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -160,6 +170,8 @@ class PaginatorViewsTest(TestCase):
         cls.second_page_post = 3
 
     def setUp(self):
+        # откат базы удаляет авторов без сигналов: сбрасываем версии lookups
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -209,3 +221,77 @@ class PaginatorViewsTest(TestCase):
                     kwargs={'username': PaginatorViewsTest.user}) + '?page=2')
         self.assertEqual(len(response.context['page_obj']),
                          PaginatorViewsTest.second_page_post)
+
+
+@override_settings(PAGINATION_MODE='cursor')
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='test-slug',
+            slug='test-slug',
+            description='Tестовое описание')
+        Post.objects.bulk_create([Post(
+            author=cls.user,
+            text=f'Тест текст {post}',
+            group=cls.group) for post in range(1, 14)
+        ])
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_pages_follow_cursor(self):
+        for url in CursorPaginatorViewsTest.urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url).context['page_obj']
+                self.assertEqual(len(first), settings.COUNT_IN_PAGES)
+                self.assertFalse(first.has_previous())
+                second = self.guest_client.get(
+                    url, {'after': first.next_cursor}).context['page_obj']
+                self.assertEqual(len(second), 3)
+                self.assertFalse(second.has_next())
+                back = self.guest_client.get(
+                    url, {'before': second.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual([post.pk for post in back],
+                                 [post.pk for post in first])
+                # вся лента без повторов и в порядке (pub_date, id)
+                feed = list(first) + list(second)
+                self.assertEqual(len({post.pk for post in feed}), 13)
+                self.assertEqual(
+                    feed, sorted(feed, key=lambda post: (post.pub_date,
+                                                         post.pk),
+                                 reverse=True))
+
+    def test_broken_cursor_shows_first_page(self):
+        response = self.guest_client.get(reverse('posts:index'),
+                                         {'after': 'не-курсор'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), settings.COUNT_IN_PAGES)
+        self.assertFalse(page_obj.has_previous())
+
+    def test_future_before_cursor_shows_first_page(self):
+        future = encode_cursor(timezone.now() + timedelta(days=1), 10 ** 9)
+        for url in CursorPaginatorViewsTest.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, {'before': future})
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                page_obj = response.context['page_obj']
+                self.assertEqual(len(page_obj), settings.COUNT_IN_PAGES)
+                self.assertFalse(page_obj.has_previous())
+                self.assertIsNotNone(page_obj.next_cursor)
+
+    def test_cursor_mode_runs_no_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(reverse('posts:index'))
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+            self.assertNotIn('OFFSET', query['sql'])
@@ -0,0 +1,110 @@
+from django.conf import settings
+
+from jobs.queue import task
+from users.models import Profile
+
+from .models import Follow, Post, TimelineEntry
+from .paginator import CursorPaginator
+
+
+def pushes_to_timelines(author_id):
+    """Раскладывать ли посты автора по лентам подписчиков при записи.
+
+    У авторов с TIMELINE_FANOUT_LIMIT подписчиков и больше запись
+    обошлась бы в миллионы строк — их посты подмешиваются при чтении.
+    """
+    return not Profile.objects.filter(
+        user_id=author_id,
+        follower_count__gte=settings.TIMELINE_FANOUT_LIMIT).exists()
+
+
+def add_entries(post_rows, user_ids, author_id):
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=pk, author_id=author_id,
+                       pub_date=pub_date)
+         for user_id in user_ids for pk, pub_date in post_rows),
+        ignore_conflicts=True)
+
+
+def fan_out(post):
+    """Добавляет пост в ленты подписчиков пачками по TIMELINE_BATCH_SIZE.
+
+    Каждая пачка — отдельная короткая транзакция, подписчики читаются
+    по pk с того места, где остановилась предыдущая.
+    """
+    if not pushes_to_timelines(post.author_id):
+        return 0
+    followers = (Follow.objects.filter(author_id=post.author_id)
+                 .order_by('pk').values_list('pk', 'user_id'))
+    size = settings.TIMELINE_BATCH_SIZE
+    last = total = 0
+    while True:
+        batch = list(followers.filter(pk__gt=last)[:size])
+        if not batch:
+            break
+        add_entries([(post.pk, post.pub_date)],
+                    [user_id for _, user_id in batch], post.author_id)
+        total += len(batch)
+        last = batch[-1][0]
+        if len(batch) < size:
+            break
+    return total
+
+
+@task
+def fan_out_post(post_id):
+    """Фоновая задача раскладки; повтор после сбоя не даёт дублей."""
+    post = (Post.objects.filter(pk=post_id)
+            .only('author_id', 'pub_date').first())
+    if post is None:
+        return 0
+    return fan_out(post)
+
+
+def backfill(user_id, author_id):
+    """Переносит в ленту нового подписчика последние посты автора."""
+    if not pushes_to_timelines(author_id):
+        return
+    posts = (Post.objects.filter(author_id=author_id)
+             .order_by('-pub_date', '-pk')
+             .values_list('pk', 'pub_date')[:settings.TIMELINE_BACKFILL])
+    add_entries(list(posts), [user_id], author_id)
+
+
+def drop_author(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id,
+                                 author_id=author_id).delete()
+
+
+class TimelinePaginator(CursorPaginator):
+    """Лента подписок: разложенные записи плюс посты крупных авторов.
+
+    Обе части листаются по одному курсору (pub_date, id поста), каждая
+    даёт не больше per_page + 1 ключей; после слияния посты страницы
+    загружаются одним запросом по id.
+    """
+
+    def __init__(self, user, per_page):
+        super().__init__(Post.objects.select_related('author', 'group'),
+                         per_page)
+        self.user = user
+
+    def pulled_authors(self):
+        return list(Follow.objects.filter(
+            user=self.user,
+            author__profile__follower_count__gte=(
+                settings.TIMELINE_FANOUT_LIMIT),
+        ).values_list('author_id', flat=True))
+
+    def slice(self, queryset, after=None, before=None):
+        entries = TimelineEntry.objects.filter(user=self.user).values_list(
+            'pub_date', 'post_id')
+        keys = set(super().slice(entries, after, before, key='post_id'))
+        authors = self.pulled_authors()
+        if authors:
+            pulled = Post.objects.filter(author_id__in=authors).values_list(
+                'pub_date', 'pk')
+            keys.update(super().slice(pulled, after, before))
+        keys = sorted(keys, reverse=before is None)[:self.per_page + 1]
+        posts = queryset.in_bulk([pk for _, pk in keys])
+        return [posts[pk] for _, pk in keys if pk in posts]
@@ -1,36 +1,63 @@
 from django.conf import settings
-from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
-from .forms import PostForm
-from .models import Group, Post
-
-User = get_user_model()
+from core.query_budget import query_budget
 
-
-def paginator_post(posts_list, request):
+from .autocomplete import search_groups
+from .cache import anonymous_page_cache, feed_dependencies, page_cache_depends
+from .detail import get_post_detail
+from .export import FORMATS, export_rows
+from .forms import PostForm
+from .lookups import get_author_or_404, get_group_or_404
+from .models import Follow, Post
+from .paginator import CursorPaginator
+from .search import SearchPaginator, fts_available
+from .timeline import TimelinePaginator
+
+
+def paginator_post(posts_list, request, count=None):
+    if settings.PAGINATION_MODE == 'cursor':
+        paginator = CursorPaginator(posts_list, settings.COUNT_IN_PAGES)
+        return paginator.get_page(after=request.GET.get('after'),
+                                  before=request.GET.get('before'))
     paginator = Paginator(posts_list, settings.COUNT_IN_PAGES)
+    if callable(count):
+        count = count()
+    if count is not None:
+        # готовый счётчик вместо COUNT(*) по всей выборке
+        paginator.count = count
     page_number = request.GET.get('page')
     # Получаем набор записей для страницы с запрошенным номером
     page_obj = paginator.get_page(page_number)
     return page_obj
 
 
+@anonymous_page_cache
+@query_budget(4)
 def index(request):
-    post_list = Post.objects.all()
-    page_obj = paginator_post(post_list, request)
+    post_list = Post.objects.feed_rows()
+    # COUNT(*) без JOIN-ов, которые нужны только столбцам карточек
+    page_obj = paginator_post(post_list, request, count=Post.objects.count)
+    page_cache_depends(request, *feed_dependencies('feed:index', page_obj))
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+@anonymous_page_cache
+@query_budget(4)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts_list = group.posts.all()
-    page_obj = paginator_post(posts_list, request)
+    group = get_group_or_404(slug)
+    posts_list = group.posts.feed_rows()
+    page_obj = paginator_post(posts_list, request, count=group.post_count)
+    names, last_modified = feed_dependencies(
+        f'feed:group:{group.pk}', page_obj)
+    page_cache_depends(request, names + [f'group:{group.pk}'],
+                       last_modified)
     template = 'posts/group_list.html'
     context = {
         'posts': posts_list,
@@ -40,22 +67,40 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@anonymous_page_cache
+@query_budget(4)
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    all_posts_user = user.posts.all()
-    page_obj = paginator_post(all_posts_user, request)
+    user = get_author_or_404(username)
+    all_posts_user = user.posts.feed_rows()
+    page_obj = paginator_post(all_posts_user, request,
+                              count=user.profile.post_count)
+    names, last_modified = feed_dependencies(
+        f'feed:profile:{user.pk}', page_obj)
+    page_cache_depends(request, names + [f'user:{user.pk}'], last_modified)
+    following = (request.user.is_authenticated
+                 and Follow.objects.filter(user=request.user,
+                                           author=user).exists())
     template = 'posts/profile.html'
     context = {
         'page_obj': page_obj,
         'author': user,
-        'all_posts_user': all_posts_user,
+        'post_count': user.profile.post_count,
+        'following': following,
     }
     return render(request, template, context)
 
 
+@anonymous_page_cache
+@query_budget(3)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    count_post = post.author.posts.all().count()
+    post, count_post = get_post_detail(post_id)
+    # счётчик постов автора меняется вместе с его лентой
+    page_cache_depends(request, [
+        f'post:{post.pk}',
+        f'group:{post.group_id}',
+        f'user:{post.author_id}',
+        f'feed:profile:{post.author_id}',
+    ], post.updated_at)
     context = {
         'post': post,
         'count_post': count_post,
@@ -63,9 +108,78 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def export_response(queryset, request, filename):
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        raise Http404('Неизвестный формат выгрузки')
+    lines, content_type = FORMATS[fmt]
+    response = StreamingHttpResponse(lines(export_rows(queryset)),
+                                     content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{fmt}"')
+    return response
+
+
+@query_budget(2)
+def group_export(request, slug):
+    group = get_group_or_404(slug)
+    return export_response(group.posts.all(), request, f'group-{slug}')
+
+
+@query_budget(2)
+def profile_export(request, username):
+    user = get_author_or_404(username)
+    return export_response(user.posts.all(), request, f'profile-{username}')
+
+
+@query_budget(2)
+def group_autocomplete(request):
+    groups = search_groups(request.GET.get('q', ''))
+    return JsonResponse({'results': groups})
+
+
+@query_budget(6)
+def search(request):
+    query = request.GET.get('q', '').strip()
+    group = author = None
+    if request.GET.get('group'):
+        group = get_group_or_404(request.GET['group'])
+    if request.GET.get('author'):
+        author = get_author_or_404(request.GET['author'])
+    after = request.GET.get('after')
+    if fts_available():
+        paginator = SearchPaginator(
+            query, settings.COUNT_IN_PAGES,
+            group_id=group and group.pk, author_id=author and author.pk)
+        page_obj = paginator.get_page(after=after)
+    else:
+        posts_list = Post.objects.select_related('author', 'group').filter(
+            text__icontains=query)
+        if group is not None:
+            posts_list = posts_list.filter(group=group)
+        if author is not None:
+            posts_list = posts_list.filter(author=author)
+        paginator = CursorPaginator(posts_list, settings.COUNT_IN_PAGES)
+        page_obj = paginator.get_page(after=after)
+    next_query = None
+    if page_obj.has_next():
+        next_query = request.GET.copy()
+        next_query['after'] = page_obj.next_cursor
+        next_query = next_query.urlencode()
+    context = {
+        'page_obj': page_obj,
+        'query': query,
+        'group': group,
+        'author': author,
+        'next_query': next_query,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required()
+@query_budget(9)
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         instance = form.save(commit=False)
         instance.author = request.user
@@ -78,13 +192,15 @@ def post_create(request):
     return render(request, 'posts/create_post.html', context)
 
 
+@query_budget(10)
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     user = request.user
-    if post.author != user:
+    if post.author_id != user.pk:
         return redirect('posts:post_detail', post_id)
 
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(request.POST or None, files=request.FILES or None,
+                    instance=post)
     if form.is_valid():
         form.save()
         return redirect('posts:post_detail', post_id)
@@ -95,3 +211,34 @@ def post_edit(request, post_id):
         'post_id': post_id
     }
     return render(request, 'posts/create_post.html', context)
+
+
+@login_required
+@query_budget(6)
+def follow_index(request):
+    paginator = TimelinePaginator(request.user, settings.COUNT_IN_PAGES)
+    page_obj = paginator.get_page(after=request.GET.get('after'),
+                                  before=request.GET.get('before'))
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/follow.html', context)
+
+
+@login_required
+@query_budget(11)
+def profile_follow(request, username):
+    author = get_author_or_404(username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username)
+
+
+@login_required
+@query_budget(8)
+def profile_unfollow(request, username):
+    author = get_author_or_404(username)
+    follow = Follow.objects.filter(user=request.user, author=author).first()
+    if follow is not None:
+        follow.delete()
+    return redirect('posts:profile', username)
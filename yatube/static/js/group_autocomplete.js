@@ -0,0 +1,54 @@
+// Поле группы в форме поста: список групп подгружается по мере ввода
+// вместо полного <select> всех групп.
+(function () {
+  'use strict';
+
+  function attach(select) {
+    var search = document.createElement('input');
+    search.type = 'search';
+    search.className = 'form-control mb-2';
+    search.placeholder = 'Начните вводить название группы';
+    search.setAttribute('aria-controls', select.id);
+    select.parentNode.insertBefore(search, select);
+
+    var timer = null;
+    var request = 0;
+
+    function fill(groups) {
+      var current = select.value;
+      var keep = Array.prototype.filter.call(select.options, function (option) {
+        return option.value === '' || option.value === current;
+      });
+      select.innerHTML = '';
+      keep.forEach(function (option) { select.appendChild(option); });
+      groups.forEach(function (group) {
+        if (String(group.id) === current) {
+          return;
+        }
+        var option = document.createElement('option');
+        option.value = group.id;
+        option.textContent = group.title + ' (' + group.slug + ')';
+        select.appendChild(option);
+      });
+    }
+
+    search.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(function () {
+        var number = ++request;
+        var url = select.dataset.autocompleteUrl +
+          '?q=' + encodeURIComponent(search.value);
+        fetch(url, {credentials: 'same-origin'})
+          .then(function (response) { return response.json(); })
+          .then(function (data) {
+            // ответ на устаревший ввод не затирает свежий
+            if (number === request) {
+              fill(data.results);
+            }
+          });
+      }, 250);
+    });
+  }
+
+  document.querySelectorAll('select[data-autocomplete-url]').forEach(attach);
+})();
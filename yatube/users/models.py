@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class Profile(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                related_name='profile',
+                                verbose_name='Пользователь')
+    # денормализованный счётчик, поддерживается сигналами posts
+    post_count = models.PositiveIntegerField('Количество постов',
+                                             default=0,
+                                             editable=False)
+    follower_count = models.PositiveIntegerField('Количество подписчиков',
+                                                 default=0,
+                                                 editable=False)
+
+    class Meta:
+        verbose_name = 'Профиль'
+        verbose_name_plural = 'Профили'
+
+    def __str__(self):
+        return self.user.username
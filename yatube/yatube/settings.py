@@ -35,15 +35,19 @@ INSTALLED_APPS = [
     'about.apps.AboutConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'jobs.apps.JobsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.InstrumentationMiddleware',
+    'core.middleware.SlowQueryLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,7 +61,8 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPALATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template.InstrumentedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [TEMPALATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -85,6 +90,41 @@ DATABASES = {
     }
 }
 
+# применяются к каждому соединению SQLite в core.db.apply_sqlite_pragmas:
+# WAL не даёт записи блокировать читателей, busy_timeout (мс) ждёт
+# блокировку вместо мгновенного "database is locked", cache_size < 0 —
+# размер кеша страниц в КиБ, mmap_size — байты файла, читаемые через mmap
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+}
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# карточки и страницы лент инвалидируются версиями, TTL — страховка
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+# страницы для анонимов проверяются по версиям, TTL ограничивает гонки
+PAGE_CACHE_TIMEOUT = 5 * 60
+# данные страницы поста проверяются по версиям поста, группы и автора
+POST_DETAIL_CACHE_TIMEOUT = 24 * 60 * 60
+# core.cache.fetch: после мягкого срока запись ещё STALE_TIMEOUT секунд
+# отдаётся, пока её пересобирает один запрос под блокировкой на
+# LOCK_TIMEOUT секунд; без записи прочие ждут его до LOCK_WAIT секунд.
+# BETA — насколько заранее, в длительностях сборки, запись начинает
+# пересобираться с растущей вероятностью; 0 — ровно в срок
+CACHE_STALE_TIMEOUT = 60
+CACHE_LOCK_TIMEOUT = 10
+CACHE_LOCK_WAIT = 0.5
+CACHE_EARLY_EXPIRY_BETA = 1.0
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -125,14 +165,102 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
 
-#  подключаем движок filebased.EmailBackend
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# письма из view ставятся в очередь jobs, воркер отправляет их
+# через JOBS_EMAIL_BACKEND — здесь это filebased.EmailBackend
+EMAIL_BACKEND = 'jobs.mail.QueuedEmailBackend'
+JOBS_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 COUNT_IN_PAGES = 10
+# 'page' — нумерованные страницы, 'cursor' — ?after=/?before= без COUNT(*)
+PAGINATION_MODE = 'page'
+# сколько номеров страниц показывать по обе стороны от текущей
+PAGINATOR_WINDOW = 2
+
+# превышение @query_budget: исключение в разработке, запись в лог в проде
+QUERY_BUDGET_STRICT = DEBUG
+
+# сколько строк выгрузки читать из базы за один fetchmany
+EXPORT_CHUNK_SIZE = 2000
+
+# сколько последних записей отдавать в RSS/Atom
+FEED_SIZE = 20
+
+# кому отдавать /metrics; None — всем (если доступ режет прокси)
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# запросы дольше порога (мс) пишутся в лог core.slow_queries,
+# повторы одной формы SQL сворачиваются в сводку раз в интервал (с)
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_SUMMARY_INTERVAL = 60
+
+# прогревать кеш шаблонов при старте воркера (см. settings_production)
+TEMPLATE_WARMUP = False
+
+# до скольких строк админка считает точно, дальше — оценка по статистике
+ADMIN_EXACT_COUNT_LIMIT = 10000
+
+# кеш slug группы и username автора в памяти процесса: сколько записей,
+# сколько секунд живут найденные и ненайденные. Фильтр Блума существующих
+# значений строит фоновая задача не чаще REBUILD_INTERVAL секунд, процесс
+# ищет новый фильтр в общем кеше не чаще CHECK_INTERVAL секунд
+LOOKUP_CACHE_SIZE = 10000
+LOOKUP_CACHE_TIMEOUT = 5 * 60
+LOOKUP_CACHE_MISS_TIMEOUT = 60
+LOOKUP_BLOOM_REBUILD_INTERVAL = 60
+LOOKUP_BLOOM_CHECK_INTERVAL = 5
+LOOKUP_BLOOM_ERROR_RATE = 0.01
+
+# Post.cached и Group.cached: результаты запросов до MAX_ROWS строк
+# хранятся в кеше под версиями таблиц, TTL — страховка
+QUERY_CACHE_TIMEOUT = 5 * 60
+QUERY_CACHE_MAX_ROWS = 1000
+
+# сколько групп отдаёт поиск по префиксу для поля группы в форме поста
+GROUP_AUTOCOMPLETE_LIMIT = 20
+
+# лента подписок: посты авторов, у которых подписчиков меньше лимита,
+# раскладываются по лентам при публикации пачками по BATCH_SIZE строк;
+# посты остальных подмешиваются при чтении. BACKFILL — сколько
+# последних постов автора попадает в ленту при подписке
+TIMELINE_FANOUT_LIMIT = 10000
+TIMELINE_BATCH_SIZE = 1000
+TIMELINE_BACKFILL = 200
+
+# миниатюры картинок постов: варианты для карточек лент и страницы поста,
+# каждый — набор ширин для srcset. Строятся после загрузки фоновой
+# задачей jobs, которая пишет url и размеры в колонку Post.thumbnails;
+# страницы читают их из строки поста, не обращаясь к файлам
+POST_THUMBNAILS = {
+    'card': {
+        'geometries': ('320x113', '640x226', '960x339'),
+        'options': {'crop': 'center', 'upscale': True},
+        'sizes': '(max-width: 960px) 100vw, 960px',
+    },
+    'detail': {
+        'geometries': ('480', '960', '1440'),
+        'options': {'upscale': False},
+        'sizes': '(max-width: 720px) 100vw, 720px',
+    },
+}
+
+# очередь фоновых задач в базе (manage.py run_workers). Взятая задача
+# скрыта от других воркеров VISIBILITY_TIMEOUT секунд; упавшая
+# повторяется с паузой от BASE_DELAY, удваивающейся до MAX_DELAY.
+# JOBS_EAGER выполняет задачи сразу в вызывающем потоке
+JOBS_EAGER = False
+JOBS_MAX_ATTEMPTS = 5
+JOBS_VISIBILITY_TIMEOUT = 5 * 60
+JOBS_RETRY_BASE_DELAY = 10
+JOBS_RETRY_MAX_DELAY = 60 * 60
+JOBS_CONCURRENCY = 2
+JOBS_POLL_INTERVAL = 1
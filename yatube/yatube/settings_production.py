@@ -0,0 +1,51 @@
+"""Настройки для продакшена поверх yatube.settings.
+
+Запуск: DJANGO_SETTINGS_MODULE=yatube.settings_production.
+"""
+
+import copy
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, TEMPLATES
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.environ.get(
+    'DJANGO_ALLOWED_HOSTS', '127.0.0.1,localhost,testserver').split(',')
+
+# соединение живёт между запросами: PRAGMA из SQLITE_PRAGMAS
+# не выполняются заново на каждый запрос
+DATABASES = copy.deepcopy(DATABASES)
+DATABASES['default']['CONN_MAX_AGE'] = 60
+
+# кеш общий для всех воркеров: версии страниц и фрагментов, payload
+# post_detail, ленты, lookups, фильтр Блума и кеш запросов сбрасываются
+# в одном процессе и должны быть видны в остальных; LocMemCache у каждого
+# процесса свой. Файловый кеш для этого слишком медленный: каждая версия —
+# открытие файла, а отсев просматривает весь каталог. В memcached add
+# атомарен (блокировки core.cache.fetch), запись — до 1 МБ
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.environ.get(
+            'DJANGO_MEMCACHED', '127.0.0.1:11211').split(','),
+    }
+}
+
+# бюджеты запросов только пишут в лог
+QUERY_BUDGET_STRICT = False
+
+# шаблоны читаются и разбираются один раз на процесс, а не на каждый
+# рендер; при заданных loaders APP_DIRS должен быть выключен
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+# разобрать все шаблоны при старте воркера, до первого запроса
+TEMPLATE_WARMUP = True